@@ -7,7 +7,9 @@ __version__ = "1.0.0"
 __author__ = "Scafld Team"
 __email__ = "scafldhq@gmail.com"
 
-from email_service.service import EmailService
+import importlib
+from typing import TYPE_CHECKING, Any
+
 from email_service.core.schemas import (
     EmailRequest,
     EmailRecipient,
@@ -22,6 +24,24 @@ from email_service.core.exceptions import (
     ConfigurationError
 )
 
+if TYPE_CHECKING:
+    from email_service.service import EmailService
+
+# Loaded on first access (PEP 562) so importing the schemas doesn't pull in
+# aiosmtplib, jinja2 and the logging setup
+_LAZY_IMPORTS = {
+    "EmailService": "email_service.service",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_IMPORTS:
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 __all__ = [
     "EmailService",
     "EmailRequest",
@@ -1,4 +1,5 @@
 import os
+import functools
 from pathlib import Path
 from pydantic_settings import BaseSettings
 from pydantic import Field
@@ -28,9 +29,14 @@ class Settings(BaseSettings):
     smtp_use_tls: bool = Field(default=False) # TLS here usually means STARTTLS (587)
     smtp_use_ssl: bool = Field(default=True)  # SSL here usually means Implicit (465)
     smtp_timeout: int = Field(default=10)
+    smtp_pool_size: int = Field(default=4) # Authenticated connections kept open between sends
+    smtp_keepalive_interval: int = Field(default=30) # Idle seconds before a pooled connection is NOOP-checked
+    smtp_pipelining: bool = Field(default=False) # Use the built-in pipelining client instead of aiosmtplib
     
     # Templates - Now uses Absolute Path
     template_dir: str = Field(default=str(BASE_DIR / "templates"))
+    template_cache_dir: Optional[str] = Field(default=None) # None uses Jinja2's per-user temp dir
+    template_auto_reload: bool = Field(default=False)
     
     # Frontend URLs
     frontend_url: str = Field(default="https://app.scafld.com")
@@ -43,4 +49,14 @@ class Settings(BaseSettings):
         env_file_encoding = "utf-8"
         extra = "ignore" # Prevents errors if .env has extra vars
 
-settings = Settings()
\ No newline at end of file
+@functools.lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """Load settings from the environment on first use"""
+    return Settings()
+
+
+def __getattr__(name: str):
+    # `settings` is resolved lazily so importing this module doesn't read .env
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
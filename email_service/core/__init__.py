@@ -4,7 +4,10 @@ from .schemas import (
     EmailResponse,
     OnboardingContext,
     EmailStats,
-    EmailPriority
+    EmailPriority,
+    WelcomeEmailContext,
+    VerificationEmailContext,
+    InviteEmailContext
 )
 from .exceptions import (
     EmailServiceError,
@@ -19,7 +22,8 @@ from .constants import (
     EMAIL_CATEGORIES,
     DEFAULT_SMTP_PORT,
     MAX_RECIPIENTS_PER_EMAIL,
-    DEFAULT_RATE_LIMIT
+    DEFAULT_RATE_LIMIT,
+    EMAIL_REGEX
 )
 
 __all__ = [
@@ -29,6 +33,9 @@ __all__ = [
     "OnboardingContext",
     "EmailStats",
     "EmailPriority",
+    "WelcomeEmailContext",
+    "VerificationEmailContext",
+    "InviteEmailContext",
     "EmailServiceError",
     "EmailDeliveryError",
     "TemplateError",
@@ -40,4 +47,5 @@ __all__ = [
     "DEFAULT_SMTP_PORT",
     "MAX_RECIPIENTS_PER_EMAIL",
     "DEFAULT_RATE_LIMIT",
+    "EMAIL_REGEX",
 ]
\ No newline at end of file
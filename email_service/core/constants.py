@@ -2,6 +2,8 @@
 Constants for email service
 """
 
+import re
+
 # Email categories
 EMAIL_CATEGORIES = {
     "ONBOARDING": "onboarding",
@@ -18,7 +20,10 @@ DEFAULT_SMTP_PORT = 587
 DEFAULT_SMTP_TIMEOUT = 30
 DEFAULT_RATE_LIMIT = 100  # emails per hour
 MAX_RECIPIENTS_PER_EMAIL = 50
+MAX_SUBJECT_LENGTH = 150
 MAX_ATTACHMENT_SIZE = 10 * 1024 * 1024  # 10MB
+ATTACHMENT_CACHE_SIZE = 64 * 1024 * 1024  # 64MB of encoded attachments kept for reuse
+MAX_LOG_HISTORY = 10_000  # in-memory log entries kept for get_recent_logs
 
 # Template constants
 DEFAULT_TEMPLATE_DIR = "email_service/templates"
@@ -31,4 +36,5 @@ HEADER_PRIORITY_NORMAL = "3 (Normal)"
 HEADER_PRIORITY_LOW = "5 (Lowest)"
 
 # Validation patterns
-EMAIL_PATTERN = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
\ No newline at end of file
+EMAIL_PATTERN = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+EMAIL_REGEX = re.compile(EMAIL_PATTERN, re.ASCII)
\ No newline at end of file
@@ -1,9 +1,15 @@
-from pydantic import BaseModel, EmailStr, Field, validator
-from typing import List, Optional, Dict, Any, Union
+from pydantic import BaseModel, EmailStr, Field, field_validator
+from typing import List, Optional, Dict, Any, Union, TypedDict
 from datetime import datetime
 from enum import Enum
 import re
 
+from email_service.core.constants import MAX_RECIPIENTS_PER_EMAIL, MAX_SUBJECT_LENGTH
+
+# Compiled once so subject validation is a single case-insensitive scan
+SPAM_TRIGGERS = ('!!!', 'FREE', 'WINNER', 'URGENT', 'ACT NOW')
+_SPAM_RE = re.compile('|'.join(map(re.escape, SPAM_TRIGGERS)), re.IGNORECASE)
+
 
 class EmailPriority(str, Enum):
     HIGH = "high"
@@ -32,7 +38,8 @@ class OnboardingContext(BaseModel):
     inviter_name: Optional[str] = None
     next_steps: List[str] = Field(default_factory=list)
     
-    @validator('next_steps')
+    @field_validator('next_steps')
+    @classmethod
     def validate_next_steps(cls, v):
         """Limit next steps to 5 items max"""
         if len(v) > 5:
@@ -40,6 +47,39 @@ class OnboardingContext(BaseModel):
         return v
 
 
+class UserContext(TypedDict):
+    """User block shared by onboarding templates"""
+    name: str
+    email: str
+
+
+class NamedContext(TypedDict):
+    """Entity referenced by name only (inviter, team)"""
+    name: str
+
+
+class WelcomeEmailContext(TypedDict):
+    """Template context for welcome.html"""
+    user: UserContext
+    verification_url: str
+    onboarding_url: str
+    next_steps: List[str]
+
+
+class VerificationEmailContext(TypedDict):
+    """Template context for verify_email.html"""
+    user: UserContext
+    verification_url: str
+
+
+class InviteEmailContext(TypedDict):
+    """Template context for invite_user.html"""
+    invitee: UserContext
+    inviter: NamedContext
+    team: NamedContext
+    invite_url: str
+
+
 class EmailRequest(BaseModel):
     """Main email request model"""
     to: List[EmailRecipient]
@@ -59,24 +99,30 @@ class EmailRequest(BaseModel):
     category: Optional[str] = None  # "onboarding", "verification", "invite"
     metadata: Dict[str, Any] = Field(default_factory=dict)
     
-    @validator('subject')
+    @field_validator('subject')
+    @classmethod
     def validate_subject(cls, v):
         """Prevent spammy subjects"""
+        # Reject oversized input before allocating a stripped copy; only
+        # surrounding whitespace could bring it back under the limit
+        if len(v) > MAX_SUBJECT_LENGTH and not (v[0].isspace() or v[-1].isspace()):
+            raise ValueError("Subject too long")
+        
         v = v.strip()
-        if len(v) > 150:
+        if len(v) > MAX_SUBJECT_LENGTH:
             raise ValueError("Subject too long")
         
         # Check for spam triggers
-        spam_triggers = ['!!!', 'FREE', 'WINNER', 'URGENT', 'ACT NOW']
-        if any(trigger in v.upper() for trigger in spam_triggers):
+        if _SPAM_RE.search(v):
             raise ValueError("Subject contains spam triggers")
         
         return v
     
-    @validator('to')
+    @field_validator('to')
+    @classmethod
     def validate_recipients(cls, v):
         """Limit recipients"""
-        if len(v) > 50:
+        if len(v) > MAX_RECIPIENTS_PER_EMAIL:
             raise ValueError("Too many recipients")
         return v
 
@@ -1,27 +1,59 @@
+import atexit
+import queue
 import structlog
 import sys
 import logging
-from typing import Any, Dict
+import orjson
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+
+_listener: Optional[QueueListener] = None
+
+
+def _dumps(obj: Any, **kwargs: Any) -> str:
+    """orjson serializer returning str for the stdlib handlers"""
+    return orjson.dumps(obj, **kwargs).decode()
+
+
+def _start_queue_listener(level: str) -> None:
+    """Route stdlib log records through a queue drained by a background thread"""
+    global _listener
+    
+    root = logging.getLogger()
+    if _listener is not None or root.handlers:
+        # Already configured here or by the host application
+        return
+    
+    log_queue: queue.Queue = queue.Queue(-1)
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(level)
 
 
 def setup_logger(level: str = "INFO") -> structlog.BoundLogger:
     """Configure structured logging"""
     
-    # Remove existing handlers
-    logging.basicConfig(level=level, format="%(message)s")
+    # Callers only enqueue the rendered line; the write to stdout happens on
+    # the listener thread so it never blocks the event loop
+    _start_queue_listener(level)
     
+    # Level filtering happens in the bound logger itself, so calls below the
+    # threshold return immediately
     structlog.configure(
         processors=[
-            structlog.stdlib.filter_by_level,
-            structlog.stdlib.add_logger_name,
-            structlog.stdlib.add_log_level,
-            structlog.stdlib.PositionalArgumentsFormatter(),
-            structlog.processors.TimeStamper(fmt="iso"),
-            structlog.processors.StackInfoRenderer(),
+            structlog.processors.add_log_level,
+            structlog.processors.TimeStamper(fmt="iso", utc=True),
             structlog.processors.format_exc_info,
-            structlog.processors.JSONRenderer()
+            structlog.processors.JSONRenderer(serializer=_dumps)
         ],
-        context_class=dict,
+        wrapper_class=structlog.make_filtering_bound_logger(logging.getLevelName(level)),
         logger_factory=structlog.stdlib.LoggerFactory(),
         cache_logger_on_first_use=True,
     )
@@ -0,0 +1,3 @@
+from .email_log import LogEntry
+
+__all__ = ["LogEntry"]
\ No newline at end of file
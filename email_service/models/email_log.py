@@ -0,0 +1,33 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+@dataclass(slots=True)
+class LogEntry:
+    """Record of a single send attempt kept in the service's log history"""
+    timestamp: datetime
+    start_time: datetime
+    recipients: List[str]
+    subject: str
+    category: Optional[str]
+    status: str
+    provider: str
+    message_id: Optional[str]
+    error: Optional[str]
+    duration_seconds: float
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize with ISO timestamps, formatted only when read"""
+        return {
+            "timestamp": self.timestamp.isoformat(),
+            "start_time": self.start_time.isoformat(),
+            "recipients": list(self.recipients),
+            "subject": self.subject,
+            "category": self.category,
+            "status": self.status,
+            "provider": self.provider,
+            "message_id": self.message_id,
+            "error": self.error,
+            "duration_seconds": self.duration_seconds,
+        }
\ No newline at end of file
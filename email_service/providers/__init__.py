@@ -1,5 +1,25 @@
+import importlib
+from typing import TYPE_CHECKING, Any
+
 from .base import EmailProvider
-from .gmail import GmailProvider
+
+if TYPE_CHECKING:
+    from .gmail import GmailProvider
+
+# Provider modules import their SMTP/HTTP clients, so load them on first access
+_LAZY_IMPORTS = {
+    "GmailProvider": ".gmail",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_IMPORTS:
+        module = importlib.import_module(_LAZY_IMPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "EmailProvider",
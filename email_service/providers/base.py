@@ -32,4 +32,13 @@ class EmailProvider(ABC):
     @abstractmethod
     def rate_limit(self) -> int:
         """Rate limit per day"""
+        pass
+    
+    @property
+    def max_concurrency(self) -> int:
+        """Sends the provider can have in flight without queueing"""
+        return 1
+    
+    async def close(self) -> None:
+        """Release any connections held by the provider"""
         pass
\ No newline at end of file
@@ -1,19 +1,59 @@
+import asyncio
+import base64
+import hashlib
+import socket
+import threading
+import time
 import aiosmtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.application import MIMEApplication
+from cachetools import LRUCache
+from email.message import EmailMessage
 from email.utils import formataddr, make_msgid, formatdate
-from typing import List
+from itertools import chain
+from typing import List, Optional, Union
 import structlog
 from datetime import datetime
 
 from email_service.providers.base import EmailProvider
-from email_service.core.schemas import EmailRequest, EmailResponse
+from email_service.providers.smtp_client import PipeliningSMTP
+from email_service.core.schemas import EmailRequest, EmailRecipient, EmailResponse
 from email_service.core.exceptions import EmailDeliveryError
+from email_service.core.constants import ATTACHMENT_CACHE_SIZE
 from email_service.config import settings
 
 logger = structlog.get_logger(__name__)
 
+SMTPClient = Union[aiosmtplib.SMTP, PipeliningSMTP]
+
+_PRIORITY_MAP = {'high': '1', 'normal': '3', 'low': '5'}
+_MSGID_DOMAIN = 'scafld.com'
+
+# Base64 bodies keyed by content hash, so resending the same file is free
+_attachment_cache: LRUCache = LRUCache(maxsize=ATTACHMENT_CACHE_SIZE, getsizeof=len)
+_attachment_cache_lock = threading.Lock()
+
+
+def _format_address(recipient: EmailRecipient) -> str:
+    """Format a recipient for a header, skipping formataddr when unnamed"""
+    if not recipient.name:
+        return recipient.email
+    return formataddr((recipient.name, recipient.email))
+
+
+def _encode_attachment(content: bytes) -> str:
+    """Base64-encode attachment content, reusing the result for repeated content"""
+    key = hashlib.sha256(content).digest()
+    with _attachment_cache_lock:
+        encoded = _attachment_cache.get(key)
+    
+    if encoded is None:
+        encoded = base64.encodebytes(content).decode('ascii')
+        if len(encoded) <= ATTACHMENT_CACHE_SIZE:
+            with _attachment_cache_lock:
+                _attachment_cache[key] = encoded
+    
+    return encoded
+
+
 class GmailProvider(EmailProvider):
     """Gmail SMTP provider"""
     
@@ -25,6 +65,22 @@ class GmailProvider(EmailProvider):
         self.timeout = settings.smtp_timeout
         self.from_email = settings.smtp_from_email
         self.from_name = settings.smtp_from_name
+        self.pool_size = settings.smtp_pool_size
+        self.keepalive_interval = settings.smtp_keepalive_interval
+        self.pipelining = settings.smtp_pipelining
+        
+        # 465 uses Implicit SSL (use_tls=True)
+        # 587 uses STARTTLS (use_tls=False, then call .starttls())
+        self._is_ssl = (self.port == 465)
+        self._from_addr = formataddr((self.from_name, self.from_email))
+        self._local_hostname: Optional[str] = None  # EHLO name, resolved on first connect
+        
+        # Idle authenticated connections with the time they were last used
+        self._pool: asyncio.Queue = asyncio.Queue()
+        
+        # One slot per connection in use; a connection is only opened when
+        # no idle one is pooled, so at most pool_size are ever open
+        self._slots = asyncio.Semaphore(self.pool_size)
         
     @property
     def name(self) -> str:
@@ -38,74 +94,173 @@ class GmailProvider(EmailProvider):
     def rate_limit(self) -> int:
         return 500
     
+    @property
+    def max_concurrency(self) -> int:
+        return self.pool_size
+    
     def validate_credentials(self) -> bool:
         return bool(self.username and self.password)
     
-    def _create_message(self, email: EmailRequest) -> MIMEMultipart:
-        msg = MIMEMultipart('alternative')
-        msg['From'] = formataddr((self.from_name, self.from_email))
-        msg['To'] = ', '.join([formataddr((r.name or '', r.email)) for r in email.to])
+    def _create_message(self, email: EmailRequest,
+                        encoded_attachments: List[str]) -> EmailMessage:
+        msg = EmailMessage()
+        msg['From'] = self._from_addr
+        msg['To'] = ', '.join(_format_address(r) for r in email.to)
         
         if email.cc:
-            msg['Cc'] = ', '.join([formataddr((r.name or '', r.email)) for r in email.cc])
+            msg['Cc'] = ', '.join(_format_address(r) for r in email.cc)
         
         msg['Subject'] = email.subject
         msg['Date'] = formatdate(localtime=True)
-        msg['Message-ID'] = make_msgid(domain='scafld.com')
-        
-        priority_map = {'high': '1', 'normal': '3', 'low': '5'}
-        msg['X-Priority'] = priority_map.get(email.priority.value, '3')
+        msg['Message-ID'] = make_msgid(domain=_MSGID_DOMAIN)
+        msg['X-Priority'] = _PRIORITY_MAP.get(email.priority.value, '3')
         msg['X-Mailer'] = 'Scafld Email Service'
         
         if email.category:
             msg['X-Scafld-Category'] = email.category
         
+        # Plain text first, HTML as the preferred alternative
         if email.text_body:
-            msg.attach(MIMEText(email.text_body, 'plain', 'utf-8'))
-        if email.html_body:
-            msg.attach(MIMEText(email.html_body, 'html', 'utf-8'))
-        
-        for attachment in email.attachments:
-            part = MIMEApplication(attachment.content, Name=attachment.filename)
-            part['Content-Disposition'] = f'attachment; filename="{attachment.filename}"'
-            part['Content-Type'] = attachment.content_type
+            msg.set_content(email.text_body)
+            if email.html_body:
+                msg.add_alternative(email.html_body, subtype='html')
+        elif email.html_body:
+            msg.set_content(email.html_body, subtype='html')
+        
+        # Attachment bodies arrive already base64-encoded
+        if email.attachments:
+            msg.make_mixed()
+        
+        for attachment, encoded in zip(email.attachments, encoded_attachments):
+            content_type = attachment.content_type
+            if '/' not in content_type:
+                content_type = 'application/octet-stream'
+            
+            part = EmailMessage()
+            part['Content-Type'] = content_type
+            part['Content-Transfer-Encoding'] = 'base64'
+            part.add_header('Content-Disposition', 'attachment',
+                            filename=attachment.filename)
+            part.set_payload(encoded)
             msg.attach(part)
         
         return msg
     
-    async def send(self, email: EmailRequest) -> EmailResponse:
-        """Send email via Gmail SMTP with dynamic SSL/TLS handling"""
+    async def _connect(self) -> SMTPClient:
+        """Open and authenticate a new SMTP connection"""
+        # The pipelining client batches the envelope into one round trip;
+        # aiosmtplib remains the default
+        client_class = PipeliningSMTP if self.pipelining else aiosmtplib.SMTP
+        
+        # getfqdn can block on DNS; look it up once, off the event loop,
+        # instead of in every client's EHLO
+        if self._local_hostname is None:
+            loop = asyncio.get_running_loop()
+            self._local_hostname = await loop.run_in_executor(None, socket.getfqdn)
+        
+        smtp_client = client_class(
+            hostname=self.host,
+            port=self.port,
+            use_tls=self._is_ssl,
+            timeout=self.timeout,
+            local_hostname=self._local_hostname
+        )
+        
+        await smtp_client.connect()
+        
+        # If we are using port 587, we must upgrade to TLS manually
+        if self.port == 587:
+            await smtp_client.starttls()
+        
+        await smtp_client.login(self.username, self.password)
+        
+        return smtp_client
+    
+    async def _reconnect(self, smtp_client: SMTPClient) -> SMTPClient:
+        """Replace a dead pooled connection with a fresh one"""
+        smtp_client.close()
+        return await self._connect()
+    
+    async def _acquire(self) -> SMTPClient:
+        """Take a live connection from the pool, opening one if none is idle"""
+        await self._slots.acquire()
+        
+        if self._pool.empty():
+            try:
+                return await self._connect()
+            except BaseException:
+                self._slots.release()
+                raise
+        
+        smtp_client, last_used = self._pool.get_nowait()
         try:
-            message = self._create_message(email)
-            
-            # 465 uses Implicit SSL (use_tls=True)
-            # 587 uses STARTTLS (use_tls=False, then call .starttls())
-            is_ssl = (self.port == 465)
-            
-            smtp_client = aiosmtplib.SMTP(
-                hostname=self.host,
-                port=self.port,
-                use_tls=is_ssl,
-                timeout=self.timeout
-            )
+            if not smtp_client.is_connected:
+                return await self._reconnect(smtp_client)
             
-            await smtp_client.connect()
-            
-            # If we are using port 587, we must upgrade to TLS manually
-            if self.port == 587:
-                await smtp_client.starttls()
-            
-            await smtp_client.login(self.username, self.password)
+            if time.monotonic() - last_used >= self.keepalive_interval:
+                try:
+                    await smtp_client.noop()
+                except aiosmtplib.SMTPException:
+                    return await self._reconnect(smtp_client)
+        except BaseException:
+            self._discard(smtp_client)
+            raise
+        
+        return smtp_client
+    
+    def _release(self, smtp_client: SMTPClient) -> None:
+        """Return a healthy connection to the pool"""
+        self._pool.put_nowait((smtp_client, time.monotonic()))
+        self._slots.release()
+    
+    def _discard(self, smtp_client: SMTPClient) -> None:
+        """Drop a connection whose state is unknown after an error"""
+        smtp_client.close()
+        self._slots.release()
+    
+    async def close(self) -> None:
+        """Quit all idle pooled connections"""
+        while not self._pool.empty():
+            smtp_client, _ = self._pool.get_nowait()
+            try:
+                await smtp_client.quit()
+            except aiosmtplib.SMTPException:
+                smtp_client.close()
+    
+    async def send(self, email: EmailRequest) -> EmailResponse:
+        """Send email via Gmail SMTP over a pooled connection"""
+        try:
+            # Encoding large attachments would stall the event loop
+            loop = asyncio.get_running_loop()
+            encoded_attachments = [
+                await loop.run_in_executor(None, _encode_attachment, attachment.content)
+                for attachment in email.attachments
+            ]
             
-            all_recipients = [r.email for r in (email.to + email.cc + email.bcc)]
+            message = self._create_message(email, encoded_attachments)
+            all_recipients = [r.email for r in chain(email.to, email.cc, email.bcc)]
             
-            await smtp_client.send_message(
-                message,
-                sender=self.from_email,
-                recipients=all_recipients
-            )
+            smtp_client = await self._acquire()
+            try:
+                try:
+                    await smtp_client.send_message(
+                        message,
+                        sender=self.from_email,
+                        recipients=all_recipients
+                    )
+                except aiosmtplib.SMTPServerDisconnected:
+                    # The server dropped the connection between sends; retry once
+                    smtp_client = await self._reconnect(smtp_client)
+                    await smtp_client.send_message(
+                        message,
+                        sender=self.from_email,
+                        recipients=all_recipients
+                    )
+            except BaseException:
+                self._discard(smtp_client)
+                raise
             
-            await smtp_client.quit()
+            self._release(smtp_client)
             
             message_id = message['Message-ID'].strip('<>')
             
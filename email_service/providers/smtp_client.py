@@ -0,0 +1,270 @@
+"""
+Minimal asyncio SMTP client that pipelines the mail envelope (RFC 2920)
+"""
+
+import asyncio
+import base64
+import re
+import socket
+import ssl
+from email.message import EmailMessage
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from aiosmtplib import (
+    SMTPAuthenticationError,
+    SMTPConnectError,
+    SMTPDataError,
+    SMTPHeloError,
+    SMTPNotSupported,
+    SMTPReadTimeoutError,
+    SMTPRecipientRefused,
+    SMTPRecipientsRefused,
+    SMTPResponse,
+    SMTPResponseException,
+    SMTPSenderRefused,
+    SMTPServerDisconnected,
+)
+from aiosmtplib.email import flatten_message, quote_address
+
+
+# Lines starting with a period must be doubled inside DATA (RFC 5321 4.5.2)
+_PERIOD_RE = re.compile(rb"(?m)^\.")
+
+
+class PipeliningSMTP:
+    """SMTP client that sends MAIL, RCPT and DATA in a single write
+
+    Implements the subset of the aiosmtplib.SMTP interface GmailProvider uses
+    and raises aiosmtplib's exception types, so both clients are handled the
+    same way. A client runs one transaction at a time.
+    """
+
+    def __init__(self, hostname: str, port: int, use_tls: bool = False,
+                 timeout: Optional[float] = None,
+                 local_hostname: Optional[str] = None):
+        self.hostname = hostname
+        self.port = port
+        self.use_tls = use_tls
+        self.timeout = timeout
+        # Name sent with EHLO; resolved once on connect when not given
+        self.local_hostname = local_hostname
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._extensions: Dict[str, str] = {}
+
+    @property
+    def is_connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    def supports_extension(self, extension: str) -> bool:
+        return extension.lower() in self._extensions
+
+    async def connect(self) -> SMTPResponse:
+        """Open the connection and identify with EHLO"""
+        tls_context = ssl.create_default_context() if self.use_tls else None
+        try:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.hostname, self.port, ssl=tls_context),
+                self.timeout
+            )
+        except (OSError, asyncio.TimeoutError) as e:
+            raise SMTPConnectError(
+                f"Error connecting to {self.hostname} on port {self.port}: {e}"
+            ) from e
+
+        greeting = await self._read_response()
+        if greeting.code != 220:
+            self.close()
+            raise SMTPConnectError(f"Unexpected greeting: {greeting.message}")
+
+        if self.local_hostname is None:
+            # getfqdn can block on DNS, so keep it off the event loop
+            loop = asyncio.get_running_loop()
+            self.local_hostname = await loop.run_in_executor(None, socket.getfqdn)
+
+        await self._ehlo()
+        return greeting
+
+    async def starttls(self) -> SMTPResponse:
+        """Upgrade the connection to TLS and re-identify"""
+        response = await self._command(b"STARTTLS", expect=220)
+        await self._writer.start_tls(
+            ssl.create_default_context(),
+            server_hostname=self.hostname
+        )
+        await self._ehlo()
+        return response
+
+    async def login(self, username: str, password: str) -> SMTPResponse:
+        """Authenticate with AUTH PLAIN"""
+        if "PLAIN" not in self._extensions.get("auth", "").upper().split():
+            raise SMTPNotSupported("Server does not support AUTH PLAIN")
+
+        token = base64.b64encode(f"\0{username}\0{password}".encode("utf-8"))
+        response = await self._command(b"AUTH PLAIN " + token)
+        if response.code != 235:
+            raise SMTPAuthenticationError(response.code, response.message)
+        return response
+
+    async def noop(self) -> SMTPResponse:
+        return await self._command(b"NOOP", expect=250)
+
+    async def quit(self) -> SMTPResponse:
+        try:
+            return await self._command(b"QUIT", expect=221)
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = None
+        self._writer = None
+
+    async def send_message(self, message: EmailMessage, *, sender: str,
+                           recipients: Sequence[str]
+                           ) -> Tuple[Dict[str, SMTPResponse], str]:
+        """Send a message, pipelining the envelope when the server allows it
+
+        Returns the refused recipients and the server's final DATA reply,
+        like aiosmtplib.SMTP.send_message.
+        """
+        mail_options: List[str] = []
+
+        try:
+            sender.encode("ascii")
+            "".join(recipients).encode("ascii")
+        except UnicodeEncodeError:
+            if not self.supports_extension("smtputf8"):
+                raise SMTPNotSupported(
+                    "An address containing non-ASCII characters was provided, but "
+                    "SMTPUTF8 is not supported by this server"
+                )
+            utf8 = True
+            mail_options.append("SMTPUTF8")
+        else:
+            utf8 = False
+
+        if self.supports_extension("8bitmime"):
+            mail_options.append("BODY=8BITMIME")
+            cte_type = "8bit"
+        else:
+            cte_type = "7bit"
+
+        data = flatten_message(message, utf8=utf8, cte_type=cte_type)
+        data = _PERIOD_RE.sub(b"..", data)
+        if not data.endswith(b"\r\n"):
+            data += b"\r\n"
+
+        if self.supports_extension("size"):
+            mail_options.insert(0, f"SIZE={len(data)}")
+
+        encoding = "utf-8" if utf8 else "ascii"
+        mail_from = " ".join([f"MAIL FROM:{quote_address(sender)}", *mail_options])
+        commands = [mail_from.encode(encoding)]
+        commands.extend(f"RCPT TO:{quote_address(r)}".encode(encoding) for r in recipients)
+        commands.append(b"DATA")
+
+        if self.supports_extension("pipelining"):
+            await self._write(b"".join(command + b"\r\n" for command in commands))
+            responses = [await self._read_response() for _ in commands]
+        else:
+            responses = []
+            for command in commands:
+                await self._write(command + b"\r\n")
+                responses.append(await self._read_response())
+
+        mail_response, *rcpt_responses, data_response = responses
+
+        refused = {
+            recipient: response
+            for recipient, response in zip(recipients, rcpt_responses)
+            if response.code not in (250, 251)
+        }
+
+        error: Optional[Exception] = None
+        if mail_response.code != 250:
+            error = SMTPSenderRefused(mail_response.code, mail_response.message, sender)
+        elif len(refused) == len(recipients):
+            error = SMTPRecipientsRefused([
+                SMTPRecipientRefused(response.code, response.message, recipient)
+                for recipient, response in refused.items()
+            ])
+
+        if data_response.code == 354:
+            # With no valid envelope the transaction is ended with an empty body
+            await self._write(data + b".\r\n" if error is None else b".\r\n")
+            final_response = await self._read_response()
+            if error is None and final_response.code != 250:
+                error = SMTPDataError(final_response.code, final_response.message)
+        elif error is None:
+            error = SMTPDataError(data_response.code, data_response.message)
+
+        if error is not None:
+            await self._reset()
+            raise error
+
+        return refused, final_response.message
+
+    async def _ehlo(self) -> None:
+        response = await self._command(b"EHLO " + self.local_hostname.encode("ascii", "ignore"))
+        if response.code != 250:
+            raise SMTPHeloError(response.code, response.message)
+
+        self._extensions = {}
+        for line in response.message.split("\n")[1:]:
+            keyword, _, params = line.partition(" ")
+            self._extensions[keyword.lower()] = params
+
+    async def _reset(self) -> None:
+        """Clear the server envelope after an error, ignoring failures"""
+        try:
+            await self._command(b"RSET")
+        except (SMTPResponseException, SMTPServerDisconnected, SMTPReadTimeoutError):
+            pass
+
+    async def _command(self, command: bytes, expect: Optional[int] = None) -> SMTPResponse:
+        await self._write(command + b"\r\n")
+        response = await self._read_response()
+        if expect is not None and response.code != expect:
+            raise SMTPResponseException(response.code, response.message)
+        return response
+
+    async def _write(self, data: bytes) -> None:
+        if not self.is_connected:
+            raise SMTPServerDisconnected("Connection lost")
+        try:
+            self._writer.write(data)
+            await self._writer.drain()
+        except OSError as e:
+            self.close()
+            raise SMTPServerDisconnected(f"Connection lost: {e}") from e
+
+    async def _read_response(self) -> SMTPResponse:
+        if self._reader is None:
+            raise SMTPServerDisconnected("Connection lost")
+
+        lines = []
+        while True:
+            try:
+                line = await asyncio.wait_for(self._reader.readline(), self.timeout)
+            except asyncio.TimeoutError as e:
+                raise SMTPReadTimeoutError("Timed out waiting for server response") from e
+            except OSError as e:
+                self.close()
+                raise SMTPServerDisconnected(f"Connection lost: {e}") from e
+
+            if not line:
+                self.close()
+                raise SMTPServerDisconnected("Unexpected EOF received")
+
+            lines.append(line[4:].strip(b" \t\r\n").decode("utf-8", "surrogateescape"))
+            if line[3:4] != b"-":
+                break
+
+        try:
+            code = int(line[:3])
+        except ValueError:
+            raise SMTPResponseException(-1, f"Malformed SMTP response line: {line!r}") from None
+
+        return SMTPResponse(code, "\n".join(lines))
@@ -1,6 +1,7 @@
 import os
-from jinja2 import Environment, FileSystemLoader, select_autoescape
-from typing import Dict, Any
+import re
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+from typing import Dict, Any, Optional
 import structlog
 
 from email_service.core.exceptions import TemplateError
@@ -8,20 +9,43 @@ from email_service.core.exceptions import TemplateError
 
 logger = structlog.get_logger(__name__)
 
+# Patterns used by _html_to_text, compiled once
+_TAG_RE = re.compile(r'<[^>]+>')
+_WS_RE = re.compile(r'\s+')
+_ENTITY_MAP = {
+    '&nbsp;': ' ',
+    '&amp;': '&',
+    '&lt;': '<',
+    '&gt;': '>',
+}
+_ENTITY_RE = re.compile('|'.join(map(re.escape, _ENTITY_MAP)))
+
 
 class Jinja2Renderer:
     """Renders email templates using Jinja2"""
     
-    def __init__(self, template_dir: str):
+    def __init__(self, template_dir: str, cache_dir: Optional[str] = None,
+                 auto_reload: bool = False):
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        
+        # Compiled templates are kept in memory and pickled to disk, so
+        # restarts skip the parse/compile step
         self.env = Environment(
             loader=FileSystemLoader(template_dir),
             autoescape=select_autoescape(['html', 'xml']),
             trim_blocks=True,
-            lstrip_blocks=True
+            lstrip_blocks=True,
+            bytecode_cache=FileSystemBytecodeCache(cache_dir),
+            auto_reload=auto_reload,
+            cache_size=400
         )
         
         # Add global functions
         self._add_globals()
+        
+        # Compile everything up front so the first send doesn't pay for it
+        self._warm_cache()
     
     def _add_globals(self):
         """Add global functions to Jinja2 environment"""
@@ -36,9 +60,11 @@ class Jinja2Renderer:
         def url_encode(value):
             return urllib.parse.quote(value)
         
+        from email_service.config import settings
+        base_url = settings.frontend_url.rstrip('/')
+        
         def frontend_url(path=""):
-            from email_service.config import settings
-            return f"{settings.frontend_url.rstrip('/')}/{path.lstrip('/')}"
+            return f"{base_url}/{path.lstrip('/')}"
         
         self.env.globals.update({
             'format_datetime': format_datetime,
@@ -47,6 +73,16 @@ class Jinja2Renderer:
             'now': datetime.utcnow
         })
     
+    def _warm_cache(self):
+        """Load every template into the environment cache"""
+        for template_name in self.env.list_templates():
+            try:
+                self.env.get_template(template_name)
+            except Exception as e:
+                logger.warning("Template precompilation failed",
+                              template=template_name,
+                              error=str(e))
+    
     def render_html(self, template_name: str, context: Dict[str, Any]) -> str:
         """Render HTML template"""
         try:
@@ -77,18 +113,13 @@ class Jinja2Renderer:
     
     def _html_to_text(self, html: str) -> str:
         """Simple HTML to text conversion"""
-        import re
-        
         # Remove HTML tags
-        text = re.sub(r'<[^>]+>', '', html)
+        text = _TAG_RE.sub('', html)
         
         # Replace multiple spaces/newlines with single ones
-        text = re.sub(r'\s+', ' ', text)
+        text = _WS_RE.sub(' ', text)
         
-        # Common HTML entities
-        text = text.replace('&nbsp;', ' ')
-        text = text.replace('&amp;', '&')
-        text = text.replace('&lt;', '<')
-        text = text.replace('&gt;', '>')
+        # Common HTML entities, decoded in a single pass
+        text = _ENTITY_RE.sub(lambda m: _ENTITY_MAP[m.group()], text)
         
         return text.strip()
\ No newline at end of file
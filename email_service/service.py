@@ -1,12 +1,18 @@
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Deque, Tuple, Union
+import asyncio
+from collections import Counter, deque
+from itertools import islice
 import structlog
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 from email_service.core.schemas import (
     EmailRequest, EmailResponse, EmailRecipient, 
-    OnboardingContext, EmailStats
+    OnboardingContext, EmailStats,
+    WelcomeEmailContext, VerificationEmailContext, InviteEmailContext
 )
 from email_service.core.exceptions import EmailDeliveryError
+from email_service.core.constants import MAX_LOG_HISTORY
+from email_service.models.email_log import LogEntry
 from email_service.providers.gmail import GmailProvider
 from email_service.providers.base import EmailProvider
 from email_service.renderer.jinja2_renderer import Jinja2Renderer
@@ -19,11 +25,28 @@ class EmailService:
     
     def __init__(self):
         self.provider = self._get_provider()
-        self.renderer = Jinja2Renderer(settings.template_dir)
-        self._logs: List[Dict[str, Any]] = []
+        self.renderer = Jinja2Renderer(
+            settings.template_dir,
+            cache_dir=settings.template_cache_dir,
+            auto_reload=settings.template_auto_reload
+        )
+        self._logs: Deque[LogEntry] = deque(maxlen=MAX_LOG_HISTORY)
         self._sent_count = 0
         self._failed_count = 0
         
+        # Running totals so get_stats never has to scan the log history;
+        # the daily ones only keep the current day as (date, count)
+        self._sent_today: Tuple[date, int] = (date.min, 0)
+        self._failed_today: Tuple[date, int] = (date.min, 0)
+        self._by_category: Counter = Counter()
+        
+        # Link prefixes only depend on settings, so build them once
+        self._onboarding_url = f"{settings.frontend_url}{settings.onboarding_path}"
+        self._verification_url_prefix = (
+            f"{settings.frontend_url}{settings.verify_email_path}?token="
+        )
+        self._invite_url_prefix = f"{settings.frontend_url}/invite/"
+        
         logger.info("Email service initialized", 
                    provider=self.provider.name)
     
@@ -65,11 +88,41 @@ class EmailService:
     
     async def send(self, email: EmailRequest) -> EmailResponse:
         """Send an email"""
+        return await self._send(email)
+    
+    async def send_many(self, emails: List[EmailRequest],
+                        concurrency: Optional[int] = None,
+                        return_exceptions: bool = False
+                        ) -> List[Union[EmailResponse, BaseException]]:
+        """Send emails concurrently, rendering templates off the event loop
+        
+        Concurrency defaults to what the provider can send at once (its
+        connection pool size). Results are in input order and follow
+        asyncio.gather semantics.
+        """
+        semaphore = asyncio.Semaphore(concurrency or self.provider.max_concurrency)
+        
+        async def send_one(email: EmailRequest) -> EmailResponse:
+            async with semaphore:
+                return await self._send(email, render_in_executor=True)
+        
+        return await asyncio.gather(
+            *(send_one(email) for email in emails),
+            return_exceptions=return_exceptions
+        )
+    
+    async def _send(self, email: EmailRequest,
+                    render_in_executor: bool = False) -> EmailResponse:
+        """Render, validate, deliver and record a single email"""
         start_time = datetime.utcnow()
         
         try:
             # Prepare email with templates
-            prepared_email = self.prepare_email(email)
+            if render_in_executor:
+                loop = asyncio.get_running_loop()
+                prepared_email = await loop.run_in_executor(None, self.prepare_email, email)
+            else:
+                prepared_email = self.prepare_email(email)
             
             # Validate before sending
             self._validate_email(prepared_email)
@@ -78,13 +131,13 @@ class EmailService:
             response = await self.provider.send(prepared_email)
             
             # Log success
-            self._log_email(prepared_email, response, None, start_time)
+            log_entry = self._log_email(prepared_email, response, None, start_time)
             self._sent_count += 1
             
             logger.info("Email sent successfully",
                        message_id=response.message_id,
                        category=email.category,
-                       duration=(datetime.utcnow() - start_time).total_seconds())
+                       duration=log_entry.duration_seconds)
             
             return response
             
@@ -98,6 +151,10 @@ class EmailService:
                         category=email.category)
             raise EmailDeliveryError(f"Failed to send email: {str(e)}")
     
+    async def close(self):
+        """Release provider connections"""
+        await self.provider.close()
+    
     def _validate_email(self, email: EmailRequest):
         """Validate email before sending"""
         if not email.to:
@@ -110,35 +167,51 @@ class EmailService:
             raise ValueError("No email content specified")
     
     def _log_email(self, email: EmailRequest, response: Optional[EmailResponse], 
-                  error: Optional[str], start_time: datetime):
+                  error: Optional[str], start_time: datetime) -> LogEntry:
         """Log email attempt"""
-        log_entry = {
-            "timestamp": datetime.utcnow().isoformat(),
-            "start_time": start_time.isoformat(),
-            "recipients": [r.email for r in email.to],
-            "subject": email.subject[:100],  # Truncate long subjects
-            "category": email.category,
-            "status": "sent" if response else "failed",
-            "provider": self.provider.name,
-            "message_id": response.message_id if response else None,
-            "error": error,
-            "duration_seconds": (datetime.utcnow() - start_time).total_seconds()
-        }
+        now = datetime.utcnow()
+        log_entry = LogEntry(
+            timestamp=now,
+            start_time=start_time,
+            recipients=[r.email for r in email.to],
+            subject=email.subject[:100],  # Truncate long subjects
+            category=email.category,
+            status="sent" if response else "failed",
+            provider=self.provider.name,
+            message_id=response.message_id if response else None,
+            error=error,
+            duration_seconds=(now - start_time).total_seconds()
+        )
         
         self._logs.append(log_entry)
+        
+        if response:
+            self._sent_today = self._count_today(self._sent_today, now.date())
+        else:
+            self._failed_today = self._count_today(self._failed_today, now.date())
+        if email.category:
+            self._by_category[email.category] += 1
+        
+        return log_entry
+    
+    @staticmethod
+    def _count_today(counter: Tuple[date, int], today: date) -> Tuple[date, int]:
+        """Add one to a daily counter, restarting it when the day changes"""
+        day, count = counter
+        return (today, count + 1) if day == today else (today, 1)
     
     # ========== ONBOARDING EMAILS ==========
     
     async def send_welcome_email(self, user_email: str, user_name: str, 
                                 verification_token: Optional[str] = None) -> EmailResponse:
         """Send welcome/verification email to new user"""
-        context = {
+        context: WelcomeEmailContext = {
             "user": {
                 "name": user_name,
                 "email": user_email
             },
             "verification_url": self._build_verification_url(verification_token),
-            "onboarding_url": f"{settings.frontend_url}{settings.onboarding_path}",
+            "onboarding_url": self._onboarding_url,
             "next_steps": [
                 "Complete your profile",
                 "Connect your first repository",
@@ -159,7 +232,7 @@ class EmailService:
     async def send_verification_email(self, user_email: str, user_name: str, 
                                      verification_token: str) -> EmailResponse:
         """Send email verification link"""
-        context = {
+        context: VerificationEmailContext = {
             "user": {
                 "name": user_name,
                 "email": user_email
@@ -181,7 +254,7 @@ class EmailService:
                                inviter_name: str, team_name: str, 
                                invite_token: str) -> EmailResponse:
         """Send team invitation email"""
-        context = {
+        context: InviteEmailContext = {
             "invitee": {
                 "name": invitee_name or "",
                 "email": invitee_email
@@ -192,7 +265,7 @@ class EmailService:
             "team": {
                 "name": team_name
             },
-            "invite_url": f"{settings.frontend_url}/invite/{invite_token}"
+            "invite_url": self._invite_url_prefix + invite_token
         }
         
         subject = f"{inviter_name} invited you to join {team_name} on Scafld"
@@ -210,40 +283,26 @@ class EmailService:
     def _build_verification_url(self, token: Optional[str]) -> str:
         """Build verification URL"""
         if not token:
-            return f"{settings.frontend_url}{settings.onboarding_path}"
-        return f"{settings.frontend_url}{settings.verify_email_path}?token={token}"
+            return self._onboarding_url
+        return self._verification_url_prefix + token
     
     # ========== STATISTICS ==========
     
     def get_stats(self) -> EmailStats:
         """Get email service statistics"""
         today = datetime.utcnow().date()
-        
-        sent_today = len([
-            log for log in self._logs
-            if log['status'] == 'sent' and 
-            datetime.fromisoformat(log['timestamp']).date() == today
-        ])
-        
-        failed_today = len([
-            log for log in self._logs
-            if log['status'] == 'failed' and 
-            datetime.fromisoformat(log['timestamp']).date() == today
-        ])
-        
-        # Group by category
-        by_category = {}
-        for log in self._logs:
-            if log['category']:
-                by_category[log['category']] = by_category.get(log['category'], 0) + 1
+        sent_day, sent_today = self._sent_today
+        failed_day, failed_today = self._failed_today
         
         return EmailStats(
-            sent_today=sent_today,
+            sent_today=sent_today if sent_day == today else 0,
             sent_total=self._sent_count,
-            failed_today=failed_today,
-            by_category=by_category
+            failed_today=failed_today if failed_day == today else 0,
+            by_category=dict(self._by_category)
         )
     
     def get_recent_logs(self, limit: int = 20) -> List[Dict[str, Any]]:
         """Get recent email logs"""
-        return self._logs[-limit:] if self._logs else []
\ No newline at end of file
+        # Walk back from the newest entry so cost scales with limit, not history
+        recent = list(islice(reversed(self._logs), limit))
+        return [entry.to_dict() for entry in reversed(recent)]
\ No newline at end of file
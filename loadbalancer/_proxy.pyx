@@ -0,0 +1,94 @@
+# cython: language_level=3
+#
+# C version of the splice proxy loop. Build next to loadbalancer.py with:
+#
+#     cythonize -i _proxy.pyx
+#
+# splice_loop moves one direction of a connection (src -> pipe -> dst)
+# without touching Python objects, so the whole transfer runs with the GIL
+# released and never allocates or copies the bytes.
+
+import os
+
+from libc.errno cimport errno, EAGAIN, EINTR
+from posix.types cimport off_t
+
+
+cdef extern from "<fcntl.h>" nogil:
+    ssize_t splice(int fd_in, off_t *off_in, int fd_out, off_t *off_out, size_t len, unsigned int flags)
+    enum:
+        SPLICE_F_MOVE
+        SPLICE_F_NONBLOCK
+
+
+cdef extern from "<poll.h>" nogil:
+    struct pollfd:
+        int fd
+        short events
+        short revents
+    int poll(pollfd *fds, unsigned long nfds, int timeout)
+    enum:
+        POLLIN
+        POLLOUT
+
+
+cdef int wait_for(int fd, short events) noexcept nogil:
+
+    # The sockets stay non-blocking (the selector loop shares them), so
+    # block here instead
+    cdef pollfd p
+    p.fd = fd
+    p.events = events
+    while poll(&p, 1, -1) < 0:
+        if errno != EINTR:
+            return -errno
+    return 0
+
+
+cdef long long _splice_loop(int src_fd, int dst_fd, int pipe_r, int pipe_w, size_t chunk) noexcept nogil:
+
+    # Returns the number of bytes moved once src hits EOF, or -errno
+    cdef unsigned int flags = SPLICE_F_MOVE | SPLICE_F_NONBLOCK
+    cdef long long total = 0
+    cdef ssize_t pending = 0
+    cdef ssize_t n
+    cdef int err
+
+    while True:
+        if not pending:
+            n = splice(src_fd, NULL, pipe_w, NULL, chunk, flags)
+            if n == 0:
+                return total
+            if n < 0:
+                if errno == EINTR:
+                    continue
+                if errno != EAGAIN:
+                    return -errno
+                err = wait_for(src_fd, POLLIN)
+                if err:
+                    return err
+                continue
+            pending = n
+
+        n = splice(pipe_r, NULL, dst_fd, NULL, pending, flags)
+        if n < 0:
+            if errno == EINTR:
+                continue
+            if errno != EAGAIN:
+                return -errno
+            err = wait_for(dst_fd, POLLOUT)
+            if err:
+                return err
+            continue
+        pending -= n
+        total += n
+
+
+def splice_loop(int src_fd, int dst_fd, int pipe_r, int pipe_w, size_t chunk=1 << 20):
+
+    cdef long long ret
+    with nogil:
+        ret = _splice_loop(src_fd, dst_fd, pipe_r, pipe_w, chunk)
+    if ret < 0:
+        raise OSError(-ret, os.strerror(-ret))
+    return ret
\ No newline at end of file
@@ -1,21 +1,139 @@
+import errno
+import os
+import random
+import selectors
 import socket
+import struct
+import sys
 import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Optional C splice loop; build it with `cythonize -i _proxy.pyx`
+try:
+    from _proxy import splice_loop
+except ImportError:
+    splice_loop = None
+
+SCRATCH_SIZE = 64 * 1024  # per-worker read buffer for the copy path
+
+# On Linux bytes are moved socket -> pipe -> socket with splice(2) and never
+# copied into Python. Other platforms use recv_into/send on a buffer.
+USE_SPLICE = hasattr(os, "splice")
+if USE_SPLICE:
+    import fcntl
+    SPLICE_FLAGS = os.SPLICE_F_MOVE | os.SPLICE_F_NONBLOCK
+PIPE_SIZE = 1 << 20  # the default 64 KiB pipe caps each splice
+PIPE_POOL_SIZE = 64  # idle pipes kept per worker for new connections
+MAX_CONNECTIONS = 4096  # per worker; clients beyond this are reset
+BACKEND_POOL_SIZE = 8  # connected spare sockets per backend, split across the workers
+SPARE_MAX_IDLE = 30  # seconds a spare may sit unused before it is replaced
+SWEEP_INTERVAL = 1  # seconds between idle sweeps in each worker
+HALF_CLOSE_TIMEOUT = 60  # seconds a half-closed connection may go without traffic
+HEALTH_LOG_INTERVAL = 60  # seconds between repeats of a backend's DOWN message
+OFFLOAD_THREADS = 16  # per worker: connections whose backend -> client side runs in C
+
+# MSG_ZEROCOPY sends (Linux 4.14+) skip the copy into the kernel, but the
+# buffer can't be touched until completion shows up on the error queue.
+# The socket module doesn't export these constants.
+MSG_ZEROCOPY = getattr(socket, "MSG_ZEROCOPY", 0x4000000)
+SO_ZEROCOPY = getattr(socket, "SO_ZEROCOPY", 60)
+SO_EE_ORIGIN_ZEROCOPY = 5
+SOCK_EXTENDED_ERR = struct.Struct("=IBBBBII")
+ZEROCOPY_MIN = 16 * 1024  # smaller sends are cheaper to copy than to track
+ZEROCOPY_RING = 4  # buffers per direction that in-flight sends may pin
+ZEROCOPY_BUFFER_SIZE = 64 * 1024  # each ring buffer; large reads make the tracking pay off
+ZEROCOPY_LINGER = 10  # seconds to wait for completions before closing anyway
+
+# On Linux the kernel tracks when data last moved on a TCP socket. This
+# is tcpi_last_data_sent and tcpi_last_data_recv (ms ago) from struct
+# tcp_info. Elsewhere only the traffic this process handles itself counts.
+USE_TCP_INFO = sys.platform.startswith("linux") and hasattr(socket, "TCP_INFO")
+TCP_INFO_LAST_DATA = struct.Struct("=44xI4xI")
+
+
+class Endpoint:
+    # One socket of a proxied connection. Bytes read from it sit in
+    # view[start:end] (or in its pipe, counted by start/end) until the
+    # peer socket has taken all of them. In copy mode (and in zerocopy mode
+    # while the whole ring is pinned) view is the worker's scratch buffer
+    # while reading, and a copy of whatever the peer didn't take after that.
+    __slots__ = ("sock", "peer", "server", "pipe", "view", "start", "end", "events",
+                 "ring", "slot", "pinned", "inflight", "zc_next", "offload", "eof", "active")
+
+    def __init__(self, sock, server=None, pipe=None, zerocopy=False):
+
+        self.sock = sock
+        self.peer = None
+        self.server = server  # set while a backend connect is in progress
+        self.pipe = pipe  # (read fd, write fd) when splicing
+        self.view = None
+        self.ring = None
+        if zerocopy:
+            # Sends from a ring slot pin it until the kernel reports them
+            # done. When every slot is pinned, reads go to the worker's
+            # scratch buffer and are sent by copy, so there is always
+            # somewhere to read into.
+            self.ring = [memoryview(bytearray(ZEROCOPY_BUFFER_SIZE)) for _ in range(ZEROCOPY_RING)]
+            self.slot = 0
+            self.pinned = [0] * len(self.ring)
+            self.inflight = {}  # zerocopy send id -> ring slot
+            self.zc_next = 0  # id the kernel gives our next zerocopy send
+            self.view = self.ring[0]
+        self.start = 0
+        self.end = 0
+        self.events = 0  # mask currently registered with the selector
+        self.offload = None  # future of the C splice loop reading this socket
+        self.eof = False  # read side finished and the FIN passed on to the peer, or closed
+        self.active = 0  # last event seen while the pair was half-closed
+
 
 class UniversalLoadBalancer:
-    def __init__(self, bind_address, port, backends):
+    def __init__(self, bind_address, port, backends, transfer=None, io_uring=False, sqpoll=False,
+                 socket_buffer=None, max_connections=MAX_CONNECTIONS):
 
         self.address = bind_address
         self.port = port
+
+        # How bytes move between sockets: "splice", "zerocopy" (MSG_ZEROCOPY
+        # sends) or "copy" (plain recv_into/send)
+        self.transfer = transfer or ("splice" if USE_SPLICE else "copy")
+
+        # Run the workers on io_uring instead of selectors, optionally with
+        # a kernel thread polling the submission queue (SQPOLL)
+        self.io_uring = io_uring
+        self.sqpoll = sqpoll
+
+        # Fixed SO_RCVBUF/SO_SNDBUF for proxied sockets; None leaves the
+        # kernel's autotuning alone, which is usually the better choice
+        self.socket_buffer = socket_buffer
+
+        # Proxied connections each worker takes on before turning clients away
+        self.max_connections = max_connections
         
         # FIX 1: Use the same name 'all_backends' everywhere
         self.all_backends = backends  
         
-        # FIX 2: Initialize this immediately so it exists for the first request
-        self.healthy_backends = list(backends) 
+        # FIX 2: Initialize this immediately so it exists for the first request.
+        # It's a tuple that health_check replaces whole, so workers can read
+        # it without a lock
+        self.healthy_backends = tuple(backends) 
+
+        # Failed sweeps in a row per backend, and when that was last printed
+        self.down_counts = {}
+        self.down_logged = {}
+
+        # One selector (epoll on Linux) and result set reused by every sweep
+        self.health_selector = selectors.DefaultSelector()
+        self.alive = set()
         
-        self.current = 0
-        self.lock = threading.Lock()
+        # Round-robin position, kept per worker thread
+        self.local = threading.local()
+
+        # Spare backend connections each worker keeps; run() divides
+        # BACKEND_POOL_SIZE between the workers
+        self.spares = BACKEND_POOL_SIZE
 
         # Start the background health checker
         threading.Thread(target=self.health_check, daemon=True).start()
@@ -23,47 +141,92 @@ class UniversalLoadBalancer:
     def health_check(self):
 
         while True:
-            alive = []
+            # Connect to every backend at once and give them all the same
+            # 1 second, rather than up to 1 second each in turn
+            sel = self.health_selector
+            alive = self.alive
+            alive.clear()
             for server in self.all_backends:
+                s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                s.setblocking(False)
                 try:
-                    # Timeout=1 is key so we don't hang the thread on a dead server
-                    with socket.create_connection(server, timeout=1):
-                        alive.append(server)
-                except:
-                    print(f"--- SERVER {server[1]} IS DOWN! ---")
+                    err = s.connect_ex(server)
+                except (OSError, socket.timeout) as e:
+                    err = e.errno or errno.EHOSTUNREACH  # e.g. the name doesn't resolve
+                if err in (0, errno.EINPROGRESS):
+                    sel.register(s, selectors.EVENT_WRITE, server)
+                else:
+                    s.close()
+
+            deadline = time.monotonic() + 1
+            while sel.get_map():
+                # Timeout=1 is key so we don't hang the thread on a dead server
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                for key, _ in sel.select(remaining):
+                    sel.unregister(key.fileobj)
+                    if not key.fileobj.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR):
+                        alive.add(key.data)
+                    key.fileobj.close()
+
+            # Whatever hasn't connected by now counts as down
+            for key in list(sel.get_map().values()):
+                sel.unregister(key.fileobj)
+                key.fileobj.close()
+
+            self.log_health(alive)
             
-            with self.lock:
-                self.healthy_backends = alive
+            # Publish the new set in one assignment (atomic under the GIL),
+            # in configured order
+            self.healthy_backends = tuple(server for server in self.all_backends if server in alive)
             
-            time.sleep(5) 
+            # Jitter so LBs started together don't probe in lockstep
+            time.sleep(random.uniform(4.5, 5.5)) 
+
+    def log_health(self, alive):
+
+        # Report a backend when it goes down and comes back, and only about
+        # once a minute in between, so an outage doesn't flood stdout
+        now = time.monotonic()
+        for server in self.all_backends:
+            if server in alive:
+                if self.down_counts.pop(server, 0):
+                    print(f"--- SERVER {server[1]} IS BACK UP ---")
+                continue
+
+            count = self.down_counts.get(server, 0) + 1
+            self.down_counts[server] = count
+            if count == 1:
+                print(f"--- SERVER {server[1]} IS DOWN! ---")
+            elif now - self.down_logged[server] >= HEALTH_LOG_INTERVAL:
+                print(f"--- SERVER {server[1]} STILL DOWN ({count} checks) ---")
+            else:
+                continue
+            self.down_logged[server] = now
         
     def get_next_server(self):
 
-        with self.lock:
-            if not self.healthy_backends:
-                print("!!! NO HEALTHY BACKENDS AVAILABLE !!!")
-                return None
-            
-            # Use modulo to cycle through only the healthy ones
-            server = self.healthy_backends[self.current % len(self.healthy_backends)]
-            self.current += 1
-            return server
+        # Read the tuple once; health_check may swap in a new one meanwhile
+        backends = self.healthy_backends
+        if not backends:
+            print("!!! NO HEALTHY BACKENDS AVAILABLE !!!")
+            return None
+        
+        # Cycle through the full list and skip the unhealthy ones, so a
+        # backend going down doesn't shift everyone else's position (with a
+        # modulo over only the healthy ones, one survivor gets a double share)
+        servers = self.all_backends
+        for _ in range(len(servers)):
+            server = servers[self.local.current % len(servers)]
+            self.local.current += 1
+            if server in backends:
+                return server
 
-    def proxy_data(self, source, destination):
+        print("!!! NO HEALTHY BACKENDS AVAILABLE !!!")
+        return None
 
-        try:
-            while True:
-                data = source.recv(4096)
-                if not data:
-                    break
-                destination.sendall(data)
-        except Exception:
-            pass
-        finally:
-            source.close()
-            destination.close()
-
-    def handle_request(self, client_conn):
+    def handle_request(self, sel, client_conn):
 
         server_info = self.get_next_server()
         if not server_info:
@@ -71,31 +234,604 @@ class UniversalLoadBalancer:
             return
 
         backend_host, backend_port = server_info
-        backend_conn = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        client_conn.setblocking(False)
+        self.tune(client_conn)
+
+        # Take a connection opened ahead of time if there is one
+        self.local.used.add(server_info)
+        backend_conn = self.take_backend(server_info)
+        pooled = backend_conn is not None
+        if not pooled:
+            backend_conn = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            backend_conn.setblocking(False)
+            self.tune(backend_conn)
+
+            # Non-blocking connect: the loop tells us when the handshake is done
+            err = backend_conn.connect_ex((backend_host, backend_port))
+            if err not in (0, errno.EINPROGRESS):
+                print(f"Failed to connect to backend {backend_port}: {os.strerror(err)}")
+                backend_conn.close()
+                client_conn.close()
+                return
+        self.warm(sel, server_info)
+
+        zerocopy = self.transfer == "zerocopy"
+        if zerocopy:
+            try:
+                client_conn.setsockopt(socket.SOL_SOCKET, SO_ZEROCOPY, 1)
+                backend_conn.setsockopt(socket.SOL_SOCKET, SO_ZEROCOPY, 1)
+            except OSError:
+                zerocopy = False  # kernel too old, plain sends still work
+
+        if self.transfer == "splice":
+            client = Endpoint(client_conn, pipe=self.take_pipe())
+            backend = Endpoint(backend_conn, server_info, pipe=self.take_pipe())
+        else:
+            client = Endpoint(client_conn, zerocopy=zerocopy)
+            backend = Endpoint(backend_conn, server_info, zerocopy=zerocopy)
+        client.peer = backend
+        backend.peer = client
+        self.local.connections += 1
+
+        if pooled:
+            self.finish_connect(sel, backend)
+            return
+
+        # The client isn't read from until the backend is connected
+        backend.events = selectors.EVENT_WRITE
+        sel.register(backend_conn, backend.events, backend)
+
+    def tune(self, sock):
+
+        # Pass small writes on at once instead of holding them for Nagle,
+        # and let the kernel notice peers that vanished without a FIN
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        if self.socket_buffer:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.socket_buffer)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.socket_buffer)
+
+    def take_backend(self, server):
+
+        idle = self.local.idle.get(server)
+        # Oldest first, so no spare sits on a backend worker for long
+        while idle:
+            sock, opened = idle.popleft()
+            if self.spare_alive(sock, opened, time.monotonic()):
+                return sock
+            sock.close()
+        return None
+
+    def spare_alive(self, sock, opened, now):
+
+        if now - opened >= SPARE_MAX_IDLE:
+            return False
+
+        # Catch connections the backend has closed while they sat idle
         try:
-            backend_conn.connect((backend_host, backend_port))
-            
-            t1 = threading.Thread(target=self.proxy_data, args=(client_conn, backend_conn))
-            t2 = threading.Thread(target=self.proxy_data, args=(backend_conn, client_conn))
-            
-            t1.start()
-            t2.start()
-        except Exception as e:
-            print(f"Failed to connect to backend {backend_port}: {e}")
-            client_conn.close()
+            return sock.recv(1, socket.MSG_PEEK) != b""
+        except BlockingIOError:
+            return True
+        except OSError:
+            return False
+
+    def warm(self, sel, server):
+
+        # Keep a few connections to this backend open so the next clients
+        # skip the handshake. Each one carries a single client and is closed
+        # with it: a raw TCP stream has no point where handing the socket to
+        # another client would be safe.
+        idle = self.local.idle.setdefault(server, deque())
+        while len(idle) + self.local.warming.get(server, 0) < self.spares:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setblocking(False)
+            self.tune(sock)
+            if sock.connect_ex(server) not in (0, errno.EINPROGRESS):
+                sock.close()
+                return
+            spare = Endpoint(sock, server)
+            spare.events = selectors.EVENT_WRITE
+            sel.register(sock, spare.events, spare)
+            self.local.warming[server] = self.local.warming.get(server, 0) + 1
+
+    def finish_warm(self, sel, spare):
+
+        sel.unregister(spare.sock)
+        spare.events = 0
+        self.local.warming[spare.server] -= 1
+        if spare.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR):
+            spare.sock.close()
+        else:
+            self.local.idle[spare.server].append((spare.sock, time.monotonic()))
+
+    def reap_spares(self, sel, now):
+
+        # Replace spares that got too old or were closed by the backend, so
+        # a client never gets handed a connection that has gone stale. Only
+        # backends that had clients since the last sweep and are up get
+        # refilled; the rest drain, so an idle balancer doesn't keep
+        # reconnecting and holding backend workers.
+        healthy = self.healthy_backends
+        used, self.local.used = self.local.used, set()
+        for server, idle in self.local.idle.items():
+            fresh = []
+            for sock, opened in idle:
+                if self.spare_alive(sock, opened, now):
+                    fresh.append((sock, opened))
+                else:
+                    sock.close()
+            if len(fresh) < len(idle):
+                idle.clear()
+                idle.extend(fresh)
+                if server in used and server in healthy:
+                    self.warm(sel, server)
+
+    def finish_connect(self, sel, backend):
+
+        err = backend.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        if err:
+            print(f"Failed to connect to backend {backend.server[1]}: {os.strerror(err)}")
+            self.close_pair(sel, backend)
+            return
+
+        backend.server = None
+        if splice_loop and backend.pipe and self.local.offloaded < OFFLOAD_THREADS:
+            self.offload(backend)
+        self.update_events(sel, backend)
+        self.update_events(sel, backend.peer)
+
+    def offload(self, backend):
+
+        # Responses are the big direction: splice them backend -> client in
+        # C on a pool thread with the GIL released, while this loop keeps
+        # handling client -> backend
+        finished, wakeup = self.local.finished, self.local.wakeup[1]
+
+        def done(future):
+            finished.append(backend)
+            try:
+                os.write(wakeup, b"\0")
+            except BlockingIOError:
+                pass  # the loop has a wakeup pending already
+
+        self.local.offloaded += 1
+        backend.offload = self.local.pool.submit(splice_loop, backend.sock.fileno(), backend.peer.sock.fileno(),
+                                                 backend.pipe[0], backend.pipe[1], PIPE_SIZE)
+        backend.offload.add_done_callback(done)
+
+    def finish_offloaded(self, sel):
+
+        try:
+            os.read(self.local.wakeup[0], 4096)
+        except BlockingIOError:
+            pass
+
+        while self.local.finished:
+            backend = self.local.finished.popleft()
+            self.local.offloaded -= 1
+            failed = backend.offload.exception()
+            backend.offload = None
+            if failed:
+                # It may have stopped with bytes still in the pipe
+                os.close(backend.pipe[0])
+                os.close(backend.pipe[1])
+                backend.pipe = None
+                self.close_pair(sel, backend)
+            else:
+                self.end_of_stream(sel, backend)
+
+    def on_event(self, sel, endpoint, mask):
+
+        # Closed by an earlier event from the same select() batch
+        if not endpoint.events:
+            return
+
+        if endpoint.server:
+            if endpoint.peer is None:
+                self.finish_warm(sel, endpoint)
+            else:
+                self.finish_connect(sel, endpoint)
+            return
+
+        if endpoint.eof or endpoint.peer.eof:
+            endpoint.active = time.monotonic()
+
+        try:
+            # Completions for the peer's zerocopy sends queue up on our socket
+            if endpoint.peer.ring:
+                self.reap_zerocopy(endpoint.peer)
+
+            # Writable: push out what the peer read earlier but couldn't send
+            if mask & selectors.EVENT_WRITE:
+                self.flush(endpoint.peer)
+
+            if mask & selectors.EVENT_READ:
+                if endpoint.pipe:
+                    n = os.splice(endpoint.sock.fileno(), endpoint.pipe[1], PIPE_SIZE, flags=SPLICE_FLAGS)
+                else:
+                    if endpoint.ring:
+                        self.pick_slot(endpoint)
+                    else:
+                        endpoint.view = self.local.scratch
+                    n = self.read_batch(endpoint)
+                if not n:
+                    self.end_of_stream(sel, endpoint)
+                    return
+                endpoint.start, endpoint.end = 0, n
+                self.flush(endpoint)
+
+                # The next read on this worker reuses the scratch buffer, so
+                # hold on to a copy of just the part the peer didn't take
+                if endpoint.view is self.local.scratch and endpoint.start < endpoint.end:
+                    endpoint.view = memoryview(endpoint.view[endpoint.start:endpoint.end].tobytes())
+                    endpoint.start, endpoint.end = 0, len(endpoint.view)
+        except BlockingIOError:
+            pass
+        except OSError:
+            self.close_pair(sel, endpoint)
+            return
+
+        self.update_events(sel, endpoint)
+        self.update_events(sel, endpoint.peer)
+
+    def end_of_stream(self, sel, endpoint):
+
+        # endpoint sent FIN, and everything it sent before has already gone
+        # to the peer (reads only happen with an empty buffer). Pass the FIN
+        # on and keep the other direction going until it finishes as well.
+        endpoint.eof = True
+        if endpoint.peer.eof:
+            self.close_pair(sel, endpoint)
+            return
+        try:
+            endpoint.peer.sock.shutdown(socket.SHUT_WR)
+        except OSError:
+            self.close_pair(sel, endpoint)
+            return
+        endpoint.active = time.monotonic()
+        self.local.half_closed.append(endpoint)
+        self.update_events(sel, endpoint)
+        self.update_events(sel, endpoint.peer)
+
+    def read_batch(self, endpoint):
+
+        # Keep reading until the socket runs dry so short reads that arrived
+        # back to back go out in one send instead of one each
+        view = endpoint.view
+        n = 0
+        while n < len(view):
+            try:
+                got = endpoint.sock.recv_into(view[n:])
+            except BlockingIOError:
+                if not n:
+                    raise
+                break
+            if not got:
+                break  # EOF; the next read after this batch is sent sees it again
+            n += got
+        return n
+
+    def flush(self, endpoint):
+
+        # Send as much of endpoint's buffer to its peer as the kernel takes
+        while endpoint.start < endpoint.end:
+            try:
+                if endpoint.pipe:
+                    endpoint.start += os.splice(endpoint.pipe[0], endpoint.peer.sock.fileno(),
+                                                endpoint.end - endpoint.start, flags=SPLICE_FLAGS)
+                elif endpoint.ring and endpoint.slot < ZEROCOPY_RING \
+                        and endpoint.end - endpoint.start >= ZEROCOPY_MIN:
+                    endpoint.start += self.send_zerocopy(endpoint)
+                else:
+                    endpoint.start += endpoint.peer.sock.send(endpoint.view[endpoint.start:endpoint.end])
+            except BlockingIOError:
+                return
+        endpoint.start = endpoint.end = 0
+
+    def send_zerocopy(self, endpoint):
+
+        sent = endpoint.peer.sock.send(endpoint.view[endpoint.start:endpoint.end], MSG_ZEROCOPY)
+
+        # Every successful MSG_ZEROCOPY send gets the next id from a per-socket
+        # counter; the slot stays pinned until that id is reported complete
+        endpoint.inflight[endpoint.zc_next] = endpoint.slot
+        endpoint.pinned[endpoint.slot] += 1
+        endpoint.zc_next = (endpoint.zc_next + 1) & 0xFFFFFFFF
+        return sent
+
+    def reap_zerocopy(self, endpoint):
+
+        # Completion ranges for endpoint's sends arrive on the peer's error queue
+        while endpoint.inflight:
+            try:
+                _, ancdata, _, _ = endpoint.peer.sock.recvmsg(0, socket.CMSG_SPACE(100), socket.MSG_ERRQUEUE)
+            except BlockingIOError:
+                return
+
+            for _, _, data in ancdata:
+                _, origin, _, _, _, lo, hi = SOCK_EXTENDED_ERR.unpack_from(data)
+                if origin != SO_EE_ORIGIN_ZEROCOPY:
+                    continue
+                for i in range(((hi - lo) & 0xFFFFFFFF) + 1):
+                    slot = endpoint.inflight.pop((lo + i) & 0xFFFFFFFF, None)
+                    if slot is not None:
+                        endpoint.pinned[slot] -= 1
+
+    def pick_slot(self, endpoint):
+
+        # Read into the first buffer no in-flight send points into, or the
+        # scratch buffer if the kernel still holds all of them
+        self.reap_zerocopy(endpoint)
+        for slot in range(ZEROCOPY_RING):
+            if not endpoint.pinned[slot]:
+                break
+        else:
+            slot = ZEROCOPY_RING
+        endpoint.slot = slot
+        endpoint.view = endpoint.ring[slot] if slot < ZEROCOPY_RING else self.local.scratch
+
+    def update_events(self, sel, endpoint):
+
+        # Only read once the previous chunk is fully sent, and only wait for
+        # writability while the peer has bytes queued for us
+        events = 0
+        if endpoint.start == endpoint.end and not (endpoint.offload or endpoint.eof):
+            events |= selectors.EVENT_READ
+        if endpoint.peer.start != endpoint.peer.end:
+            events |= selectors.EVENT_WRITE
+
+        if events == endpoint.events:
+            return
+        if not endpoint.events:
+            sel.register(endpoint.sock, events, endpoint)
+        elif not events:
+            sel.unregister(endpoint.sock)
+        else:
+            sel.modify(endpoint.sock, events, endpoint)
+        endpoint.events = events
+
+    def close_pair(self, sel, endpoint):
+
+        offloaded = endpoint.offload or endpoint.peer.offload
+        if not offloaded:
+            self.local.connections -= 1
+
+        for side in (endpoint, endpoint.peer):
+            if side.events:
+                sel.unregister(side.sock)
+                side.events = 0
+
+            # The C loop still uses both sockets; shutting them down makes it
+            # return, and finish_offloaded closes the pair after that
+            side.eof = True
+            if offloaded:
+                try:
+                    side.sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+                continue
+
+            if side.pipe:
+                self.release_pipe(side)
+
+            # Closing now would let the peer's pinned buffers be freed and
+            # reused while the kernel may still be sending from them
+            if side.peer.ring and side.peer.inflight:
+                try:
+                    self.reap_zerocopy(side.peer)
+                except OSError:
+                    side.peer.inflight.clear()
+            if side.peer.ring and side.peer.inflight:
+                self.local.lingering.append((time.monotonic() + ZEROCOPY_LINGER, side.peer))
+            else:
+                side.sock.close()
+
+    def reap_lingering(self, sel):
+
+        now = time.monotonic()
+        if now >= self.local.next_sweep:
+            self.local.next_sweep = now + SWEEP_INTERVAL
+            self.reap_spares(sel, now)
+            self.reap_half_closed(sel, now)
+
+        if not self.local.lingering:
+            return
+        lingering = []
+        for deadline, endpoint in self.local.lingering:
+            try:
+                self.reap_zerocopy(endpoint)
+            except OSError:
+                endpoint.inflight.clear()
+            if endpoint.inflight and now < deadline:
+                lingering.append((deadline, endpoint))
+            else:
+                endpoint.peer.sock.close()
+        self.local.lingering = lingering
+
+    def idle_for(self, endpoint, now):
+
+        # Seconds since data last moved on the pair
+        idle = now - max(endpoint.active, endpoint.peer.active)
+        if USE_TCP_INFO:
+            try:
+                for sock in (endpoint.sock, endpoint.peer.sock):
+                    sent, received = TCP_INFO_LAST_DATA.unpack_from(
+                        sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_INFO, TCP_INFO_LAST_DATA.size))
+                    idle = min(idle, sent / 1000, received / 1000)
+                return idle
+            except (OSError, struct.error):
+                pass
+
+        # Without the kernel's view, the direction an offload thread moves
+        # looks idle even while it streams, so never expire those
+        if endpoint.offload or endpoint.peer.offload:
+            return 0
+        return idle
+
+    def reap_half_closed(self, sel, now):
+
+        # A peer that never sends its FIN would otherwise keep a half-closed
+        # pair, and both of its sockets, open forever
+        half_closed = []
+        for endpoint in self.local.half_closed:
+            if endpoint.peer.eof:
+                continue  # closed since
+            if self.idle_for(endpoint, now) >= HALF_CLOSE_TIMEOUT:
+                self.close_pair(sel, endpoint)
+            else:
+                half_closed.append(endpoint)
+        self.local.half_closed = half_closed
+
+    def take_pipe(self):
+
+        # Reuse an empty pipe from this worker before creating a new one
+        if self.local.pipes:
+            return self.local.pipes.pop()
+
+        pipe_r, pipe_w = os.pipe()
+        try:
+            fcntl.fcntl(pipe_w, fcntl.F_SETPIPE_SZ, PIPE_SIZE)
+        except OSError:
+            pass  # over pipe-max-size or the per-user limit; the default size still works
+        return pipe_r, pipe_w
+
+    def release_pipe(self, endpoint):
+
+        # A pipe with unsent bytes left in it can't be handed to a new connection
+        if endpoint.start == endpoint.end and len(self.local.pipes) < PIPE_POOL_SIZE:
+            self.local.pipes.append(endpoint.pipe)
+        else:
+            os.close(endpoint.pipe[0])
+            os.close(endpoint.pipe[1])
+        endpoint.pipe = None
+
+    def accept(self, sel, listener):
+
+        # Drain everything that queued up since the last wakeup
+        while True:
+            try:
+                client_conn, addr = listener.accept()
+            except BlockingIOError:
+                return
+            if self.local.connections >= self.max_connections:
+                self.reject(client_conn)
+            else:
+                self.handle_request(sel, client_conn)
+
+    def reject(self, client_conn):
+
+        # Reset rather than queue work the worker can't keep up with; the
+        # client gets an immediate error instead of a hung connection
+        client_conn.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+        client_conn.close()
+
+    def listen(self):
+
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # Allow address reuse so you can restart the LB immediately
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        # Let every worker bind its own socket to the same port; the kernel
+        # then spreads incoming connections across their accept queues
+        if hasattr(socket, "SO_REUSEPORT"):
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        # Accepted sockets take their receive buffer (and so the window
+        # they advertise in the handshake) from the listener
+        if self.socket_buffer:
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.socket_buffer)
+        s.bind((self.address, self.port))
+        # Room for bursts of connections between two accept sweeps
+        s.listen(4096)
+        s.setblocking(False)
+        return s
+
+    def serve(self, listener):
+
+        # Each worker has its own round-robin position, so picking a
+        # backend never contends with the other workers
+        self.local.current = 0
+        self.local.pipes = []
+        self.local.lingering = []  # endpoints waiting on zerocopy completions
+        self.local.scratch = memoryview(bytearray(SCRATCH_SIZE))
+        self.local.connections = 0
+        self.local.offloaded = 0
+        self.local.finished = deque()  # offloaded backends whose C loop returned
+        self.local.idle = {}  # backend -> deque of (connected socket nobody uses yet, opened at), oldest first
+        self.local.used = set()  # backends that had clients since the last sweep
+        self.local.warming = {}  # backend -> pool connects still in progress
+        self.local.next_sweep = 0
+        self.local.half_closed = []  # endpoints whose FIN went on while the peer still sends
+
+        sel = selectors.DefaultSelector()
+        sel.register(listener, selectors.EVENT_READ)
+
+        # Pool threads running the C splice loop report back through a pipe
+        if splice_loop and self.transfer == "splice":
+            self.local.pool = ThreadPoolExecutor(OFFLOAD_THREADS)
+            self.local.wakeup = os.pipe()
+            for fd in self.local.wakeup:
+                os.set_blocking(fd, False)
+            sel.register(self.local.wakeup[0], selectors.EVENT_READ, self.local.finished)
+
+        # One thread multiplexes all of this worker's connections (epoll on Linux)
+        with listener:
+            while True:
+                # Poll while closed sockets still wait on zerocopy completions,
+                # otherwise wake up for the idle sweep
+                timeout = 0.1 if self.local.lingering else SWEEP_INTERVAL
+                for key, mask in sel.select(timeout):
+                    if key.data is None:
+                        self.accept(sel, listener)
+                    elif key.data is self.local.finished:
+                        self.finish_offloaded(sel)
+                    else:
+                        self.on_event(sel, key.data, mask)
+                self.reap_lingering(sel)
+
+    def serve_uring(self, listener):
+
+        from uring import IoUringLoop
+
+        self.local.current = 0
+        try:
+            loop = IoUringLoop(self, listener, sqpoll=self.sqpoll)
+        except OSError as e:
+            # e.g. a kernel without provided buffer rings
+            print(f"io_uring setup failed ({e}), using the selector loop")
+            self.serve(listener)
+            return
+        with listener:
+            loop.run()
 
     def run(self):
         
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            # Allow address reuse so you can restart the LB immediately
-            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            s.bind((self.address, self.port))
-            s.listen(100)
-            print(f"Load Balancer active on {self.address}:{self.port}")
-            
-            while True:
-                client_conn, addr = s.accept()
-                threading.Thread(target=self.handle_request, args=(client_conn,)).start()
+        serve = self.serve
+        if self.io_uring:
+            # Optional io_uring engine; needs liburing (e.g. pip install liburing).
+            # Only loaded when asked for, so the other modes never depend on it.
+            try:
+                import uring
+            except ImportError:
+                print("io_uring requested but liburing isn't available, using selectors")
+            else:
+                serve = self.serve_uring
+
+        # One worker (listener + selector) per core. Without SO_REUSEPORT
+        # only one socket can be bound, so fall back to a single worker.
+        workers = os.cpu_count() or 1
+        if not hasattr(socket, "SO_REUSEPORT"):
+            workers = 1
+
+        # Keep the total number of spare backend connections the same
+        # however many workers share it
+        self.spares = max(1, -(-BACKEND_POOL_SIZE // workers))
+
+        # Bind everything up front so a busy port fails here, not in a thread
+        listeners = [self.listen() for _ in range(workers)]
+        print(f"Load Balancer active on {self.address}:{self.port} ({workers} workers)")
+
+        for listener in listeners[1:]:
+            threading.Thread(target=serve, args=(listener,), daemon=True).start()
+        serve(listeners[0])
 
 my_servers = [
     ('127.0.0.1', 8001), 
@@ -0,0 +1,478 @@
+import ctypes
+import ctypes.util
+import errno
+import mmap
+import os
+import socket
+import struct
+from collections import deque
+
+# Values from the kernel ABI (include/uapi/linux/io_uring.h)
+IORING_SETUP_SQPOLL = 1 << 1
+IORING_CQE_F_BUFFER = 1 << 0
+IORING_CQE_F_MORE = 1 << 1
+IORING_CQE_F_NOTIF = 1 << 3
+IORING_CQE_BUFFER_SHIFT = 16
+IOSQE_BUFFER_SELECT = 1 << 5
+IORING_ASYNC_CANCEL_ALL = 1 << 0
+IORING_OP_SEND_ZC = 47
+MAP_HUGETLB = 0x40000  # not exported by the mmap module
+
+RING_ENTRIES = 4096
+RING_STRUCT_SIZE = 1024  # comfortably larger than liburing's struct io_uring
+BUFFER_SIZE = 16 * 1024
+BUFFER_COUNT = 2048  # receive buffers in the worker's provided-buffer ring
+BUFFER_GROUP = 0
+MAX_QUEUED = 8  # received chunks a side may have waiting before it stops reading
+ZEROCOPY_MIN = 4096  # smaller sends are cheaper to copy than to wait on a notification
+
+# Each SQE's user_data packs what the completion is for (low bits), the id
+# of the Side it belongs to, and for sends the buffer id (top 16 bits)
+ACCEPT, CONNECT, RECV, SEND, SEND_ZC, CANCEL = range(6)
+OP_BITS = 3
+OP_MASK = (1 << OP_BITS) - 1
+BID_SHIFT = 48
+SIDE_MASK = (1 << (BID_SHIFT - OP_BITS)) - 1
+
+
+class Cqe(ctypes.Structure):
+    _fields_ = [
+        ("user_data", ctypes.c_uint64),
+        ("res", ctypes.c_int32),
+        ("flags", ctypes.c_uint32),
+    ]
+
+
+class Iovec(ctypes.Structure):
+    _fields_ = [
+        ("iov_base", ctypes.c_void_p),
+        ("iov_len", ctypes.c_size_t),
+    ]
+
+
+_P = ctypes.c_void_p
+_SIGNATURES = {
+    "io_uring_queue_init": ([ctypes.c_uint, _P, ctypes.c_uint], ctypes.c_int),
+    "io_uring_register_buffers": ([_P, ctypes.POINTER(Iovec), ctypes.c_uint], ctypes.c_int),
+    "io_uring_get_probe_ring": ([_P], _P),
+    "io_uring_opcode_supported": ([_P, ctypes.c_int], ctypes.c_int),
+    "io_uring_free_probe": ([_P], None),
+    "io_uring_get_sqe": ([_P], _P),
+    "io_uring_submit": ([_P], ctypes.c_int),
+    "io_uring_submit_and_wait": ([_P, ctypes.c_uint], ctypes.c_int),
+    "io_uring_peek_cqe": ([_P, ctypes.POINTER(ctypes.POINTER(Cqe))], ctypes.c_int),
+    "io_uring_cqe_seen": ([_P, ctypes.POINTER(Cqe)], None),
+    "io_uring_sqe_set_data64": ([_P, ctypes.c_uint64], None),
+    "io_uring_sqe_set_flags": ([_P, ctypes.c_uint], None),
+    "io_uring_sqe_set_buf_group": ([_P, ctypes.c_int], None),
+    "io_uring_setup_buf_ring": ([_P, ctypes.c_uint, ctypes.c_int, ctypes.c_uint, ctypes.POINTER(ctypes.c_int)], _P),
+    "io_uring_buf_ring_add": ([_P, _P, ctypes.c_uint, ctypes.c_ushort, ctypes.c_int, ctypes.c_int], None),
+    "io_uring_buf_ring_advance": ([_P, ctypes.c_int], None),
+    "io_uring_buf_ring_mask": ([ctypes.c_uint32], ctypes.c_int),
+    "io_uring_prep_multishot_accept": ([_P, ctypes.c_int, _P, _P, ctypes.c_int], None),
+    "io_uring_prep_connect": ([_P, ctypes.c_int, _P, ctypes.c_uint32], None),
+    "io_uring_prep_recv_multishot": ([_P, ctypes.c_int, _P, ctypes.c_size_t, ctypes.c_int], None),
+    "io_uring_prep_send": ([_P, ctypes.c_int, _P, ctypes.c_size_t, ctypes.c_int], None),
+    "io_uring_prep_send_zc": ([_P, ctypes.c_int, _P, ctypes.c_size_t, ctypes.c_int, ctypes.c_uint], None),
+    "io_uring_prep_send_zc_fixed": ([_P, ctypes.c_int, _P, ctypes.c_size_t, ctypes.c_int, ctypes.c_uint,
+                                     ctypes.c_uint], None),
+    "io_uring_prep_cancel_fd": ([_P, ctypes.c_int, ctypes.c_uint], None),
+    "io_uring_prep_cancel64": ([_P, ctypes.c_uint64, ctypes.c_int], None),
+}
+
+
+def _load_liburing():
+
+    # The io_uring_prep_* helpers are inline in liburing.h, so only the -ffi
+    # build of the library exports them. python-liburing bundles one.
+    path = ctypes.util.find_library("uring-ffi")
+    if path is None:
+        try:
+            import liburing
+        except ImportError:
+            return None
+        path = os.path.join(os.path.dirname(liburing.__file__), "liburing.so")
+
+    try:
+        lib = ctypes.CDLL(path)
+    except OSError:
+        return None
+
+    for name, (argtypes, restype) in _SIGNATURES.items():
+        # Older liburing builds lack the newer helpers (buffer rings, SEND_ZC)
+        func = getattr(lib, name, None)
+        if func is None:
+            return None
+        func.argtypes = argtypes
+        func.restype = restype
+    return lib
+
+
+_lib = _load_liburing()
+if _lib is None:
+    raise ImportError("liburing is not available")
+
+
+class Connection:
+    # A client/backend pair. Sockets are only closed once every operation
+    # the kernel still holds for them has completed.
+    __slots__ = ("server", "sides", "ops", "closing", "sockaddr")
+
+    def __init__(self, server):
+
+        self.server = server
+        self.sides = ()
+        self.ops = 0  # submitted operations without a final completion yet
+        self.closing = False
+        self.sockaddr = None  # kept alive until the connect completes
+
+
+class Side:
+    # One socket of a connection. A multishot receive fills buffers picked
+    # by the kernel from the shared ring; they queue up here as
+    # [buffer id, length, sent] and go to the peer one at a time, in order.
+    __slots__ = ("id", "conn", "sock", "fd", "peer", "queue", "sending", "receiving", "cancelling", "eof")
+
+    def __init__(self, side_id, conn, sock):
+
+        self.id = side_id
+        self.conn = conn
+        self.sock = sock
+        self.fd = sock.fileno()
+        self.peer = None
+        self.queue = deque()
+        self.sending = False
+        self.receiving = False  # a multishot receive is armed
+        self.cancelling = False  # ... and we've asked the kernel to stop it
+        self.eof = False  # the socket hit EOF; pass it on once the queue is sent
+
+
+class IoUringLoop:
+    # Runs one worker's accept -> connect -> proxy cycle on a single ring.
+    # Completions queue up follow-on SQEs, and everything queued while
+    # handling a batch goes to the kernel in one io_uring_submit_and_wait.
+
+    def __init__(self, lb, listener, sqpoll=False):
+
+        self.lb = lb
+        self.listener = listener
+
+        self.ring = ctypes.create_string_buffer(RING_STRUCT_SIZE)
+        ret = _lib.io_uring_queue_init(RING_ENTRIES, self.ring, IORING_SETUP_SQPOLL if sqpoll else 0)
+        if ret < 0:
+            raise OSError(-ret, f"io_uring_queue_init: {os.strerror(-ret)}")
+        self.cqe = ctypes.POINTER(Cqe)()
+
+        # All receive buffers live in one anonymous mapping
+        size = BUFFER_COUNT * BUFFER_SIZE
+        try:
+            self.region = mmap.mmap(-1, size, mmap.MAP_PRIVATE | mmap.MAP_ANONYMOUS | MAP_HUGETLB)
+        except OSError:
+            # No huge pages reserved; ask for transparent ones instead
+            self.region = mmap.mmap(-1, size)
+            self.region.madvise(mmap.MADV_HUGEPAGE)
+        self.base = ctypes.addressof(ctypes.c_char.from_buffer(self.region))
+
+        # Hand the buffers to the kernel as a provided-buffer ring: each
+        # receive completion says which one it filled, and a buffer goes
+        # back on the ring once its bytes have been sent on
+        err = ctypes.c_int()
+        self.buf_ring = _lib.io_uring_setup_buf_ring(self.ring, BUFFER_COUNT, BUFFER_GROUP, 0, ctypes.byref(err))
+        if not self.buf_ring:
+            raise OSError(-err.value, f"io_uring_setup_buf_ring: {os.strerror(-err.value)}")
+        self.buf_mask = _lib.io_uring_buf_ring_mask(BUFFER_COUNT)
+        for bid in range(BUFFER_COUNT):
+            _lib.io_uring_buf_ring_add(self.buf_ring, self.base + bid * BUFFER_SIZE, BUFFER_SIZE,
+                                       bid, self.buf_mask, bid)
+        _lib.io_uring_buf_ring_advance(self.buf_ring, BUFFER_COUNT)
+
+        # References per buffer: one while its chunk is queued, plus one per
+        # zerocopy send the kernel may still be reading it for
+        self.buffer_refs = [0] * BUFFER_COUNT
+        self.starved = set()  # sides whose receive stopped for lack of buffers
+
+        # Large sends use SEND_ZC. Registering the region as fixed buffer 0
+        # lets those sends skip pinning pages on every request; that can
+        # fail against RLIMIT_MEMLOCK, in which case plain SEND_ZC is used.
+        self.zerocopy = self.opcode_supported(IORING_OP_SEND_ZC)
+        iovec = Iovec(self.base, size)
+        self.fixed = self.zerocopy and _lib.io_uring_register_buffers(self.ring, ctypes.byref(iovec), 1) == 0
+
+        self.sides = {}
+        self.next_id = 1  # 0 is the listener
+        self.sockaddrs = {}
+
+    def opcode_supported(self, opcode):
+
+        probe = _lib.io_uring_get_probe_ring(self.ring)
+        if not probe:
+            return False
+        try:
+            return bool(_lib.io_uring_opcode_supported(probe, opcode))
+        finally:
+            _lib.io_uring_free_probe(probe)
+
+    def get_sqe(self, side_id, op, bid=0):
+
+        sqe = _lib.io_uring_get_sqe(self.ring)
+        if not sqe:
+            # Submission queue is full: hand it to the kernel and retry
+            _lib.io_uring_submit(self.ring)
+            sqe = _lib.io_uring_get_sqe(self.ring)
+        _lib.io_uring_sqe_set_data64(sqe, bid << BID_SHIFT | side_id << OP_BITS | op)
+        return sqe
+
+    def sockaddr(self, server):
+
+        # Packed struct sockaddr_in for a backend, built once per backend
+        packed = self.sockaddrs.get(server)
+        if packed is None:
+            host, port = server
+            packed = (struct.pack("=H", socket.AF_INET) + struct.pack("!H", port)
+                      + socket.inet_aton(socket.gethostbyname(host)) + bytes(8))
+            self.sockaddrs[server] = packed
+        return packed
+
+    def arm_accept(self):
+
+        # One multishot accept keeps producing a CQE per new connection
+        sqe = self.get_sqe(0, ACCEPT)
+        _lib.io_uring_prep_multishot_accept(sqe, self.listener.fileno(), None, None, 0)
+
+    def add_side(self, conn, sock):
+
+        side = Side(self.next_id, conn, sock)
+        self.sides[side.id] = side
+        self.next_id += 1
+        return side
+
+    def handle_request(self, fd):
+
+        client_conn = socket.socket(fileno=fd)
+        if len(self.sides) >= 2 * self.lb.max_connections:
+            self.lb.reject(client_conn)
+            return
+
+        server_info = self.lb.get_next_server()
+        if not server_info:
+            client_conn.close()
+            return
+
+        backend_conn = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.lb.tune(client_conn)
+        self.lb.tune(backend_conn)
+
+        conn = Connection(server_info)
+        client = self.add_side(conn, client_conn)
+        backend = self.add_side(conn, backend_conn)
+        client.peer = backend
+        backend.peer = client
+        conn.sides = (client, backend)
+
+        conn.sockaddr = ctypes.create_string_buffer(self.sockaddr(server_info), 16)
+        sqe = self.get_sqe(backend.id, CONNECT)
+        _lib.io_uring_prep_connect(sqe, backend.fd, conn.sockaddr, 16)
+        conn.ops += 1
+
+    def recv(self, side):
+
+        # One SQE keeps receiving until it is cancelled or runs out of buffers
+        sqe = self.get_sqe(side.id, RECV)
+        _lib.io_uring_prep_recv_multishot(sqe, side.fd, None, 0, 0)
+        _lib.io_uring_sqe_set_flags(sqe, IOSQE_BUFFER_SELECT)
+        _lib.io_uring_sqe_set_buf_group(sqe, BUFFER_GROUP)
+        side.receiving = True
+        side.conn.ops += 1
+
+    def pause(self, side):
+
+        # Too much is queued for a slow peer; stop taking buffers from the
+        # ring for this side until the queue drains
+        sqe = self.get_sqe(side.id, CANCEL)
+        _lib.io_uring_prep_cancel64(sqe, side.id << OP_BITS | RECV, 0)
+        side.cancelling = True
+        side.conn.ops += 1
+
+    def resume(self, side):
+
+        if not (side.receiving or side.eof or side.conn.closing) and len(side.queue) < MAX_QUEUED:
+            self.recv(side)
+
+    def send(self, side):
+
+        # Send the oldest queued chunk (or what's left of it) to the peer
+        bid, length, sent = side.queue[0]
+        addr = self.base + bid * BUFFER_SIZE + sent
+        length -= sent
+        if self.zerocopy and length >= ZEROCOPY_MIN:
+            # The kernel reads straight from the buffer, so it can't go back
+            # on the ring until the notification CQE arrives
+            sqe = self.get_sqe(side.id, SEND_ZC, bid)
+            if self.fixed:
+                _lib.io_uring_prep_send_zc_fixed(sqe, side.peer.fd, addr, length, socket.MSG_NOSIGNAL, 0, 0)
+            else:
+                _lib.io_uring_prep_send_zc(sqe, side.peer.fd, addr, length, socket.MSG_NOSIGNAL, 0)
+            self.buffer_refs[bid] += 1
+        else:
+            sqe = self.get_sqe(side.id, SEND, bid)
+            _lib.io_uring_prep_send(sqe, side.peer.fd, addr, length, socket.MSG_NOSIGNAL)
+        side.sending = True
+        side.conn.ops += 1
+
+    def unref(self, bid):
+
+        self.buffer_refs[bid] -= 1
+        if self.buffer_refs[bid]:
+            return
+
+        _lib.io_uring_buf_ring_add(self.buf_ring, self.base + bid * BUFFER_SIZE, BUFFER_SIZE,
+                                   bid, self.buf_mask, 0)
+        _lib.io_uring_buf_ring_advance(self.buf_ring, 1)
+
+        # Buffers are available again, so restart receives that ran dry
+        if self.starved:
+            starved, self.starved = self.starved, set()
+            for side in starved:
+                self.resume(side)
+
+    def close(self, conn):
+
+        # Cancel whatever is still queued on either socket; the pair is
+        # released when the last of those completions comes back
+        conn.closing = True
+        for side in conn.sides:
+            self.starved.discard(side)
+            sqe = self.get_sqe(side.id, CANCEL)
+            _lib.io_uring_prep_cancel_fd(sqe, side.fd, IORING_ASYNC_CANCEL_ALL)
+            conn.ops += 1
+
+    def release(self, conn):
+
+        for side in conn.sides:
+            side.sock.close()
+            for bid, _, _ in side.queue:
+                self.unref(bid)
+            del self.sides[side.id]
+
+    def on_recv(self, side, res, flags):
+
+        if not flags & IORING_CQE_F_MORE:
+            side.receiving = side.cancelling = False
+            side.conn.ops -= 1
+
+        if flags & IORING_CQE_F_BUFFER:
+            bid = flags >> IORING_CQE_BUFFER_SHIFT
+            self.buffer_refs[bid] = 1
+            if side.conn.closing:
+                self.unref(bid)
+                return
+            side.queue.append([bid, res, 0])
+            if not side.sending:
+                self.send(side)
+            if side.receiving:
+                if len(side.queue) >= MAX_QUEUED and not side.cancelling:
+                    self.pause(side)
+            else:
+                self.resume(side)
+        elif side.conn.closing:
+            return
+        elif res == -errno.ENOBUFS:
+            self.starved.add(side)
+        elif res == -errno.ECANCELED:
+            self.resume(side)  # paused, unless the queue already drained
+        elif res == 0:
+            side.eof = True
+            if not side.queue:
+                self.end_of_stream(side)
+        else:
+            self.close(side.conn)
+
+    def on_send(self, side, bid, res):
+
+        side.sending = False
+        if side.conn.closing:
+            return
+        if res < 0:
+            self.close(side.conn)
+            return
+
+        chunk = side.queue[0]
+        chunk[2] += res
+        if chunk[2] < chunk[1]:
+            self.send(side)
+            return
+
+        side.queue.popleft()
+        self.unref(bid)
+        if side.queue:
+            self.send(side)
+        elif side.eof:
+            self.end_of_stream(side)
+            return
+        self.resume(side)
+
+    def end_of_stream(self, side):
+
+        # Everything side sent before its FIN has reached the peer: forward
+        # the FIN, and close the pair once the other direction is done too
+        peer = side.peer
+        if peer.eof and not peer.queue:
+            self.close(side.conn)
+            return
+        try:
+            peer.sock.shutdown(socket.SHUT_WR)
+        except OSError:
+            self.close(side.conn)
+
+    def complete(self, user_data, res, flags):
+
+        op = user_data & OP_MASK
+        if op == ACCEPT:
+            if not flags & IORING_CQE_F_MORE:
+                self.arm_accept()  # the kernel ended the multishot
+            if res >= 0:
+                self.handle_request(res)
+            return
+
+        side = self.sides[(user_data >> OP_BITS) & SIDE_MASK]
+        conn = side.conn
+
+        if op == RECV:
+            self.on_recv(side, res, flags)
+        elif op == SEND_ZC and flags & IORING_CQE_F_NOTIF:
+            # Second completion of a zerocopy send: the buffer is free again
+            conn.ops -= 1
+            self.unref(user_data >> BID_SHIFT)
+        elif op in (SEND, SEND_ZC):
+            # A zerocopy send flagged F_MORE still has its notification to come
+            if op == SEND or not flags & IORING_CQE_F_MORE:
+                conn.ops -= 1
+                if op == SEND_ZC:
+                    self.buffer_refs[user_data >> BID_SHIFT] -= 1
+            self.on_send(side, user_data >> BID_SHIFT, res)
+        else:
+            conn.ops -= 1
+            if op == CONNECT and not conn.closing:
+                if res < 0:
+                    print(f"Failed to connect to backend {conn.server[1]}: {os.strerror(-res)}")
+                    self.close(conn)
+                else:
+                    conn.sockaddr = None
+                    self.recv(side)
+                    self.recv(side.peer)
+
+        if conn.closing and not conn.ops:
+            self.release(conn)
+
+    def run(self):
+
+        self.arm_accept()
+        cqe = self.cqe
+        while True:
+            # One syscall submits everything queued and waits for completions
+            _lib.io_uring_submit_and_wait(self.ring, 1)
+            while _lib.io_uring_peek_cqe(self.ring, ctypes.byref(cqe)) == 0:
+                entry = cqe.contents
+                user_data, res, flags = entry.user_data, entry.res, entry.flags
+                _lib.io_uring_cqe_seen(self.ring, cqe)
+                self.complete(user_data, res, flags)
\ No newline at end of file
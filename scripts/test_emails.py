@@ -39,22 +39,29 @@ async def test_all_emails():
         }
     ]
     
-    for test in tests:
-        print(f"\n📧 Testing: {test['name']}")
-        
-        email = EmailRequest(
+    emails = [
+        EmailRequest(
             to=[EmailRecipient(email="test@example.com", name="Test User")],
             subject=f"Test: {test['name']}",
             template_name=test["template"],
             context=test["context"],
             category="test"
         )
+        for test in tests
+    ]
+    
+    # The sends are independent, so run them concurrently
+    responses = await email_service.send_many(emails, return_exceptions=True)
+    
+    for test, response in zip(tests, responses):
+        print(f"\n📧 Testing: {test['name']}")
         
-        try:
-            response = await email_service.send(email)
+        if isinstance(response, BaseException):
+            print(f"❌ Failed: {response}")
+        else:
             print(f"✅ Success! Message ID: {response.message_id}")
-        except Exception as e:
-            print(f"❌ Failed: {e}")
+    
+    await email_service.close()
 
 if __name__ == "__main__":
     asyncio.run(test_all_emails())
\ No newline at end of file
@@ -16,15 +16,7 @@ from email_service.core.schemas import EmailRecipient, EmailRequest
 from email_service.core.exceptions import EmailDeliveryError
 
 
-def create_test_templates():
-    """Create minimal test templates if they don't exist"""
-    templates_dir = Path(__file__).parent.parent / "email_service" / "templates"
-    templates_dir.mkdir(exist_ok=True)
-    
-    # Create base.html
-    base_html = templates_dir / "base.html"
-    if not base_html.exists():
-        base_html.write_text("""
+_BASE_HTML = """
 <!DOCTYPE html>
 <html>
 <head>
@@ -44,12 +36,9 @@ def create_test_templates():
     </div>
 </body>
 </html>
-        """)
-    
-    # Create welcome.html
-    welcome_html = templates_dir / "welcome.html"
-    if not welcome_html.exists():
-        welcome_html.write_text("""
+        """
+
+_WELCOME_HTML = """
 {% extends "base.html" %}
 
 {% block content %}
@@ -76,12 +65,9 @@ def create_test_templates():
     <p>Need help? Contact us at support@scafld.com</p>
 </div>
 {% endblock %}
-        """)
-    
-    # Create verify_email.html
-    verify_html = templates_dir / "verify_email.html"
-    if not verify_html.exists():
-        verify_html.write_text("""
+        """
+
+_VERIFY_EMAIL_HTML = """
 {% extends "base.html" %}
 
 {% block content %}
@@ -94,16 +80,9 @@ def create_test_templates():
     <p>This link expires in 24 hours.</p>
 </div>
 {% endblock %}
-        """)
-    
-    # Create plain_text directory
-    plain_text_dir = templates_dir / "plain_text"
-    plain_text_dir.mkdir(exist_ok=True)
-    
-    # Create welcome.txt
-    welcome_txt = plain_text_dir / "welcome.txt"
-    if not welcome_txt.exists():
-        welcome_txt.write_text("""Welcome to Scafld, {{ user.name }}! 🎉
+        """
+
+_WELCOME_TXT = """Welcome to Scafld, {{ user.name }}! 🎉
 
 We're excited to have you on board.
 
@@ -119,12 +98,9 @@ Getting Started:
 
 Best regards,
 The Scafld Team
-""")
-    
-    # Create verify_email.txt
-    verify_txt = plain_text_dir / "verify_email.txt"
-    if not verify_txt.exists():
-        verify_txt.write_text("""Verify Your Email
+"""
+
+_VERIFY_EMAIL_TXT = """Verify Your Email
 
 Hello {{ user.name }},
 
@@ -135,7 +111,27 @@ This link expires in 24 hours.
 
 Best regards,
 The Scafld Team
-""")
+"""
+
+TEMPLATES = {
+    "base.html": _BASE_HTML,
+    "welcome.html": _WELCOME_HTML,
+    "verify_email.html": _VERIFY_EMAIL_HTML,
+    "plain_text/welcome.txt": _WELCOME_TXT,
+    "plain_text/verify_email.txt": _VERIFY_EMAIL_TXT,
+}
+
+
+def create_test_templates():
+    """Create minimal test templates if they don't exist"""
+    templates_dir = Path(__file__).parent.parent / "email_service" / "templates"
+    templates_dir.mkdir(exist_ok=True)
+    (templates_dir / "plain_text").mkdir(exist_ok=True)
+    
+    for name, content in TEMPLATES.items():
+        path = templates_dir / name
+        if not path.exists():
+            path.write_text(content)
 
 
 async def test_onboarding_emails():
@@ -183,37 +179,43 @@ async def test_onboarding_emails():
     ]
     
     # Also test direct email sending (no template)
+    direct_email = EmailRequest(
+        to=[EmailRecipient(email=test_email, name=test_name)],
+        subject="Test Direct Email from Scafld",
+        html_body="<h1>Hello!</h1><p>This is a direct email test.</p>",
+        text_body="Hello!\nThis is a direct email test.",
+        category="test"
+    )
+    
+    # The sends are independent, so run them all concurrently
+    direct_response, *responses = await asyncio.gather(
+        service.send(direct_email),
+        *(test['func'](*test['args']) for test in tests),
+        return_exceptions=True
+    )
+    
     print("\n4. Testing Direct Email (No Template)")
     print("   Direct email without template")
     print(f"   To: {test_email}")
     
-    try:
-        direct_email = EmailRequest(
-            to=[EmailRecipient(email=test_email, name=test_name)],
-            subject="Test Direct Email from Scafld",
-            html_body="<h1>Hello!</h1><p>This is a direct email test.</p>",
-            text_body="Hello!\nThis is a direct email test.",
-            category="test"
-        )
-        response = await service.send(direct_email)
-        print(f"   ✅ Success! Message ID: {response.message_id}")
-    except Exception as e:
-        print(f"   ❌ Failed: {str(e)}")
+    if isinstance(direct_response, BaseException):
+        print(f"   ❌ Failed: {str(direct_response)}")
+    else:
+        print(f"   ✅ Success! Message ID: {direct_response.message_id}")
     
-    # Run the template-based tests
-    for i, test in enumerate(tests, 1):
+    # Report the template-based tests
+    for i, (test, response) in enumerate(zip(tests, responses), 1):
         print(f"\n{i}. Testing: {test['name']}")
         print(f"   {test['desc']}")
         print(f"   To: {test_email}")
         
-        try:
-            response = await test['func'](*test['args'])
-            print(f"   ✅ Success! Message ID: {response.message_id}")
-        except EmailDeliveryError as e:
-            print(f"   ❌ Delivery failed: {str(e)}")
+        if isinstance(response, EmailDeliveryError):
+            print(f"   ❌ Delivery failed: {str(response)}")
             print(f"     Check your SMTP credentials and internet connection")
-        except Exception as e:
-            print(f"   ❌ Unexpected error: {str(e)}")
+        elif isinstance(response, BaseException):
+            print(f"   ❌ Unexpected error: {str(response)}")
+        else:
+            print(f"   ✅ Success! Message ID: {response.message_id}")
     
     # Show statistics
     print("\n" + "=" * 50)
@@ -237,6 +239,8 @@ async def test_onboarding_emails():
         if len(subject) > 40:
             subject = subject[:37] + "..."
         print(f"   {status_icon} {subject} ({log['status']})")
+    
+    await service.close()
 
 
 def check_dependencies():
@@ -248,6 +252,7 @@ def check_dependencies():
         "pydantic",
         "pydantic_settings",
         "structlog",
+        "orjson",
         "dotenv"
     ]
     
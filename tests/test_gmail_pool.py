@@ -0,0 +1,74 @@
+"""
+Regression tests for GmailProvider's SMTP connection pool
+"""
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+
+import aiosmtplib
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from email_service.core.exceptions import EmailDeliveryError
+from email_service.core.schemas import EmailRecipient, EmailRequest
+from email_service.providers.gmail import GmailProvider
+
+
+class RejectingClient:
+    """Connected SMTP client whose server refuses every recipient"""
+
+    def __init__(self):
+        self.is_connected = True
+
+    async def send_message(self, message, *, sender, recipients):
+        await asyncio.sleep(0.01)
+        raise aiosmtplib.SMTPRecipientsRefused([
+            aiosmtplib.SMTPRecipientRefused(550, "No such user", r) for r in recipients
+        ])
+
+    def close(self):
+        self.is_connected = False
+
+
+class ConnectionPoolTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.provider = GmailProvider()
+        self.opened = 0
+
+        async def connect():
+            self.opened += 1
+            return RejectingClient()
+
+        self.provider._connect = connect
+
+    def _email(self, i: int) -> EmailRequest:
+        return EmailRequest(
+            to=[EmailRecipient(email=f"rejected{i}@example.com")],
+            subject=f"Pool test {i}",
+            text_body="Hello"
+        )
+
+    async def test_failed_sends_do_not_strand_waiters(self):
+        # More failing sends than pool slots: every discard must free a
+        # slot for a waiting send instead of leaving it blocked forever
+        results = await asyncio.wait_for(
+            asyncio.gather(
+                *(self.provider.send(self._email(i)) for i in range(10)),
+                return_exceptions=True
+            ),
+            timeout=5
+        )
+
+        self.assertEqual(len(results), 10)
+        for result in results:
+            self.assertIsInstance(result, EmailDeliveryError)
+        self.assertEqual(self.opened, 10)
+
+        # All slots are free again
+        for _ in range(self.provider.pool_size):
+            await asyncio.wait_for(self.provider._slots.acquire(), timeout=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
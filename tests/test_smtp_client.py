@@ -0,0 +1,205 @@
+"""
+Tests for PipeliningSMTP against a fake SMTP server
+"""
+import asyncio
+import sys
+import unittest
+from email.message import EmailMessage
+from pathlib import Path
+
+import aiosmtplib
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from email_service.providers.smtp_client import PipeliningSMTP
+
+
+class FakeSMTPServer:
+    """Just enough of an SMTP server to check what the client sends
+
+    With pipelining on, replies to MAIL and RCPT are held back until DATA
+    arrives, so a client that waits for each reply would stall.
+    """
+
+    def __init__(self, pipelining: bool = True, refuse=(), data_without_recipients: int = 554):
+        self.pipelining = pipelining
+        self.refuse = set(refuse)
+        self.data_without_recipients = data_without_recipients
+        self.commands = []
+        self.messages = []
+        self.sessions = []
+
+    async def start(self) -> int:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        # Sessions end once the client has hung up
+        await asyncio.gather(*self.sessions)
+
+    async def _handle(self, reader, writer):
+        self.sessions.append(asyncio.current_task())
+        writer.write(b"220 fake.example ESMTP\r\n")
+        held = []
+        accepted = 0
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            command = line.rstrip(b"\r\n").decode()
+            self.commands.append(command)
+            verb = command.split(" ", 1)[0].split(":", 1)[0].upper()
+
+            if verb == "EHLO":
+                extensions = ["SIZE 1000000", "8BITMIME"]
+                if self.pipelining:
+                    extensions.append("PIPELINING")
+                lines = ["fake.example", *extensions]
+                reply = "".join(f"250-{ext}\r\n" for ext in lines[:-1]) + f"250 {lines[-1]}\r\n"
+            elif verb == "MAIL":
+                accepted = 0
+                reply = "250 2.1.0 OK\r\n"
+            elif verb == "RCPT":
+                if command.split(":", 1)[1].strip("<>") in self.refuse:
+                    reply = "550 5.1.1 No such user\r\n"
+                else:
+                    accepted += 1
+                    reply = "250 2.1.5 OK\r\n"
+            elif verb == "DATA":
+                code = 354 if accepted else self.data_without_recipients
+                writer.write("".join(held).encode())
+                held = []
+                if code != 354:
+                    writer.write(b"554 5.5.1 No valid recipients\r\n")
+                    continue
+                writer.write(b"354 Go ahead\r\n")
+                body = []
+                while (line := await reader.readline()) != b".\r\n":
+                    body.append(line)
+                self.messages.append(b"".join(body))
+                reply = "250 2.0.0 OK queued\r\n" if accepted else "554 5.5.1 No valid recipients\r\n"
+            elif verb in ("RSET", "NOOP"):
+                reply = "250 2.0.0 OK\r\n"
+            elif verb == "QUIT":
+                writer.write(b"221 2.0.0 Bye\r\n")
+                await writer.drain()
+                break
+            else:
+                reply = "502 5.5.2 Command not implemented\r\n"
+
+            if self.pipelining and verb in ("MAIL", "RCPT"):
+                held.append(reply)
+            else:
+                writer.write(reply.encode())
+            await writer.drain()
+        writer.close()
+
+
+class PipeliningSMTPTest(unittest.IsolatedAsyncioTestCase):
+    async def _connect(self, **server_options) -> PipeliningSMTP:
+        self.server = FakeSMTPServer(**server_options)
+        port = await self.server.start()
+        self.addAsyncCleanup(self.server.stop)
+
+        client = PipeliningSMTP("127.0.0.1", port, timeout=5, local_hostname="client.example")
+        await client.connect()
+        self.addCleanup(client.close)
+        return client
+
+    def _message(self, *recipients: str) -> EmailMessage:
+        message = EmailMessage()
+        message["From"] = "sender@example.com"
+        message["To"] = ", ".join(recipients)
+        message["Subject"] = "Hello"
+        message.set_content("First line\n.leading period\n.\nLast line\n")
+        return message
+
+    async def _send(self, client: PipeliningSMTP, *recipients: str):
+        return await asyncio.wait_for(
+            client.send_message(
+                self._message(*recipients),
+                sender="sender@example.com",
+                recipients=list(recipients)
+            ),
+            timeout=5
+        )
+
+    def _verbs(self):
+        return [command.split(" ", 1)[0].split(":", 1)[0] for command in self.server.commands]
+
+    async def test_pipelined_envelope(self):
+        client = await self._connect()
+        self.assertTrue(client.supports_extension("pipelining"))
+
+        refused, message = await self._send(client, "a@example.com", "b@example.com")
+
+        self.assertEqual(refused, {})
+        self.assertEqual(message, "2.0.0 OK queued")
+        self.assertEqual(self._verbs(), ["EHLO", "MAIL", "RCPT", "RCPT", "DATA"])
+        self.assertEqual(self.server.commands[0], "EHLO client.example")
+        self.assertIn("SIZE=", self.server.commands[1])
+        self.assertIn("BODY=8BITMIME", self.server.commands[1])
+
+    async def test_dot_stuffing(self):
+        client = await self._connect()
+
+        await self._send(client, "a@example.com")
+
+        body = self.server.messages[0]
+        self.assertIn(b"\r\n..leading period\r\n", body)
+        self.assertIn(b"\r\n..\r\nLast line\r\n", body)
+        self.assertTrue(body.endswith(b"\r\n"))
+
+    async def test_partial_refusal(self):
+        client = await self._connect(refuse={"b@example.com"})
+
+        refused, _ = await self._send(client, "a@example.com", "b@example.com")
+
+        self.assertEqual(list(refused), ["b@example.com"])
+        self.assertEqual(refused["b@example.com"].code, 550)
+        self.assertEqual(len(self.server.messages), 1)
+        self.assertNotIn("RSET", self._verbs())
+
+    async def test_total_refusal_resets(self):
+        client = await self._connect(refuse={"a@example.com", "b@example.com"})
+
+        with self.assertRaises(aiosmtplib.SMTPRecipientsRefused) as raised:
+            await self._send(client, "a@example.com", "b@example.com")
+
+        self.assertEqual(
+            [error.recipient for error in raised.exception.recipients],
+            ["a@example.com", "b@example.com"]
+        )
+        self.assertEqual(self._verbs(), ["EHLO", "MAIL", "RCPT", "RCPT", "DATA", "RSET"])
+        self.assertEqual(self.server.messages, [])
+
+        # The connection is still usable for the next transaction
+        self.assertEqual((await client.noop()).code, 250)
+        self.assertEqual((await client.quit()).code, 221)
+        self.assertFalse(client.is_connected)
+
+    async def test_total_refusal_after_354_sends_empty_body(self):
+        client = await self._connect(refuse={"a@example.com"}, data_without_recipients=354)
+
+        with self.assertRaises(aiosmtplib.SMTPRecipientsRefused):
+            await self._send(client, "a@example.com")
+
+        self.assertEqual(self.server.messages, [b""])
+        self.assertEqual(self._verbs()[-1], "RSET")
+
+    async def test_without_pipelining(self):
+        client = await self._connect(pipelining=False)
+        self.assertFalse(client.supports_extension("pipelining"))
+
+        refused, message = await self._send(client, "a@example.com")
+
+        self.assertEqual(refused, {})
+        self.assertEqual(message, "2.0.0 OK queued")
+        self.assertEqual(self._verbs(), ["EHLO", "MAIL", "RCPT", "DATA"])
+        self.assertEqual(len(self.server.messages), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file